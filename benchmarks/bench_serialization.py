@@ -0,0 +1,102 @@
+"""
+Micro-benchmark: share of /predict request time spent on JSON serialization.
+
+Compares the previous path (stdlib json for the auditor body, the auditor prompt
+and FastAPI's default response encoding) with the current one (model_dump_json,
+a single orjson-encoded auditor body and ORJSONResponse), and reports each as a
+fraction of an end-to-end /predict call with the auditor mocked out.
+
+    PYTHONPATH=. python benchmarks/bench_serialization.py
+"""
+import json
+import logging
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from services.loan_inference.app.api import audit_request_body
+from services.loan_inference.app.main import app
+from services.loan_inference.app.models import LoanApplication, PredictionResponse
+
+ITERATIONS = 20000
+REQUESTS = 500
+
+PAYLOAD = {
+    "applicant_income": 85000,
+    "credit_score": 740,
+    "loan_amount": 30000,
+    "employment_status": "freelance"
+}
+AUDIT = {
+    "audit_id": "0b7f6f7e-3f0e-4a43-9d55-5b0f4b8f1c2e",
+    "status": "FLAGGED",
+    "compliance_score": 0.4,
+    "comments": ["ADVISORY: Freelance income with borderline credit score requires manual review."],
+    "mode": "GEN_AI"
+}
+
+
+def _per_call_us(fn) -> float:
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - started) / ITERATIONS * 1e6
+
+
+def legacy_serialization(application: LoanApplication, prediction: PredictionResponse) -> None:
+    # Inference -> auditor request body (httpx json=)
+    body = json.dumps({"decision_reason": "Met all criteria", "applicant_data": application.model_dump()}).encode()
+    # Auditor: request decode + prompt re-serialization + response encode
+    request = json.loads(body)
+    json.dumps(request["applicant_data"])
+    json.dumps(AUDIT).encode()
+    # Inference: default FastAPI response encoding
+    json.dumps(jsonable_encoder(prediction)).encode()
+
+
+def fast_serialization(application: LoanApplication, prediction: PredictionResponse) -> None:
+    body = audit_request_body(application.model_dump_json().encode(), [])
+    request = orjson.loads(body)
+    orjson.dumps(request["applicant_data"])
+    orjson.dumps(AUDIT)
+    prediction.model_dump_json()
+
+
+def request_time_us() -> float:
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = AUDIT
+    with patch("httpx.AsyncClient.post", new_callable=AsyncMock, return_value=response):
+        client = TestClient(app)
+        client.post("/api/v1/predict", json=PAYLOAD)  # warm-up
+        started = time.perf_counter()
+        for _ in range(REQUESTS):
+            client.post("/api/v1/predict", json=PAYLOAD)
+        return (time.perf_counter() - started) / REQUESTS * 1e6
+
+
+def main() -> None:
+    # Keep request/SQL logging out of the measurement
+    logging.disable(logging.CRITICAL)
+
+    application = LoanApplication(**PAYLOAD)
+    prediction = PredictionResponse(
+        approved=True, confidence_score=0.82, reasons=[], audit_analysis=AUDIT,
+        stage_timings_ms={"inference": 0.02, "compliance_audit": 410.5, "ledger_commit": 3.1}
+    )
+
+    legacy_us = _per_call_us(lambda: legacy_serialization(application, prediction))
+    fast_us = _per_call_us(lambda: fast_serialization(application, prediction))
+    request_us = request_time_us()
+
+    print(f"/predict request (auditor mocked): {request_us:9.1f} us")
+    print(f"serialization, before:             {legacy_us:9.1f} us  ({legacy_us / (request_us - fast_us + legacy_us):6.2%} of request)")
+    print(f"serialization, after:              {fast_us:9.1f} us  ({fast_us / request_us:6.2%} of request)")
+    print(f"speed-up:                          {legacy_us / fast_us:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,21 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from typing import List
+import asyncio
+import math
 import uuid
 import logging
 import os
-import json
+import orjson
+import msgpack
+import numpy as np
 from dotenv import load_dotenv
 import google.generativeai as genai
+from .profiling import install_profiling
+from .audit_schema import AuditRequest, AuditResponse, MSGPACK_MEDIA_TYPE
+from .admission import install_admission_control
 
 # Setup Environment
 # Load .env from services/compliance_auditor/.env (parent of app/)
@@ -15,8 +26,18 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
-app = FastAPI(title="Compliance Auditor Agent", version="1.1.0")
+# Max concurrent Gemini calls across /audit and /audit/batch
+AUDIT_LLM_CONCURRENCY = int(os.getenv("AUDIT_LLM_CONCURRENCY", "8"))
+llm_semaphore = asyncio.Semaphore(AUDIT_LLM_CONCURRENCY)
+
+# One task and one buffered result per item: cap it like the inference side's MAX_BATCH_SIZE
+AUDIT_MAX_BATCH_SIZE = int(os.getenv("AUDIT_MAX_BATCH_SIZE", "1000"))
+audit_batch_adapter = TypeAdapter(List[AuditRequest])
+
+app = FastAPI(title="Compliance Auditor Agent", version="1.1.0", default_response_class=ORJSONResponse)
 logger = logging.getLogger("compliance_auditor")
+install_profiling(app)
+install_admission_control(app)
 
 SYSTEM_PROMPT = """You are a professional Banking Compliance Auditor at FinCore AI. Your task is to review loan decisions for potential bias, discrimination, or logical errors. 
 Analyze the decision reason against the applicant data. 
@@ -25,6 +46,31 @@ Look for violations of Fair Lending practices.
 CRITICAL RULE: Evaluate this loan decision strictly. If the decision is "Approved" but the metrics (Income, Credit Score) are borderline or conflicting (e.g. Low Score + High Income), you MUST flag it for review. Do NOT just agree with the inference engine. 
 Return your response in JSON format with fields: "status" (CLEARED/FLAGGED), "compliance_score" (0.0 to 1.0), and "detailed_analysis" (a brief paragraph explaining your thought process)."""
 
+def get_rule_based_decisions(decision_reasons: List[str], applicant_data: List[dict]) -> List[dict]:
+    """Vectorized `get_rule_based_decision` over a whole batch."""
+    reasons = np.asarray(decision_reasons, dtype=str)
+    credit_scores = np.fromiter(
+        (data.get("credit_score", 0) for data in applicant_data), dtype=np.float64, count=len(applicant_data)
+    )
+
+    missing_reason = np.char.str_len(reasons) == 0
+    employment_bias = (np.char.find(np.char.lower(reasons), "employed") >= 0) & (credit_scores > 700)
+    flagged = missing_reason | employment_bias
+
+    results = []
+    for is_flagged, is_missing, is_biased in zip(flagged.tolist(), missing_reason.tolist(), employment_bias.tolist()):
+        audit_comments = []
+        if is_missing:
+            audit_comments.append("REDACTED: Decision lacks transparent reasoning.")
+        if is_biased:
+            audit_comments.append("ADVISORY: Potential bias detected. High credit score rejected due to employment status.")
+        results.append({
+            "status": "FLAGGED" if is_flagged else "CLEARED",
+            "compliance_score": 0.4 if is_flagged else 1.0,
+            "detailed_analysis": "; ".join(audit_comments) if audit_comments else "Automated Check Cleared."
+        })
+    return results
+
 def get_rule_based_decision(decision_reason: str, applicant_data: dict) -> dict:
     """Fallback logic if AI is offline."""
     flagged = False
@@ -52,49 +98,142 @@ async def get_ai_audit_decision(decision_reason: str, applicant_data: dict) -> d
     model = genai.GenerativeModel('gemini-flash-latest')
     prompt = f"""
     Decision Reason: {decision_reason}
-    Applicant Data: {json.dumps(applicant_data)}
+    Applicant Data: {orjson.dumps(applicant_data).decode()}
     """
     
-    # Instruct model to return JSON
-    response = await model.generate_content_async(
-        f"{SYSTEM_PROMPT}\n{prompt}",
-        generation_config={"response_mime_type": "application/json"}
-    )
+    # Instruct model to return JSON; all endpoints share one concurrency budget
+    async with llm_semaphore:
+        response = await model.generate_content_async(
+            f"{SYSTEM_PROMPT}\n{prompt}",
+            generation_config={"response_mime_type": "application/json"}
+        )
     
-    return json.loads(response.text)
+    return orjson.loads(response.text)
+
+def build_audit_response(result: dict, used_agent: bool) -> dict:
+    """
+    Map a rule-based or Gemini result onto the AuditResponse contract. LLM output is
+    untrusted: the score is coerced to a float in [0, 1], and anything that cannot be
+    coerced raises ValueError so callers fall back to the rule-based decision.
+    """
+    if not isinstance(result, dict):
+        raise ValueError("Audit result is not a JSON object")
 
-@app.post("/audit")
-async def perform_audit(audit_request: dict):
-    decision_reason = audit_request.get("decision_reason", "")
-    applicant_data = audit_request.get("applicant_data", {})
-    
-    result = None
-    used_agent = False
-    
-    # Try AI Agent
-    try:
-        result = await get_ai_audit_decision(decision_reason, applicant_data)
-        used_agent = True
-    except Exception as e:
-        logger.warning(f"AI Agent failed, falling back to rules. Error: {e}")
-        result = get_rule_based_decision(decision_reason, applicant_data)
-        
     # Map result to API response (preserving compatibility with Project 1)
     status = result.get("status", "UNKNOWN")
-    score = result.get("compliance_score", 0.0)
-    analysis = result.get("detailed_analysis", "")
-    
+    analysis = result.get("detailed_analysis") or ""
+    if not isinstance(status, str) or not isinstance(analysis, str):
+        raise ValueError("Audit status and detailed_analysis must be strings")
+    try:
+        score = float(result.get("compliance_score", 0.0))
+    except (TypeError, ValueError):
+        raise ValueError("compliance_score is not numeric")
+    if not math.isfinite(score):
+        raise ValueError("compliance_score is not finite")
+
     # Ensure comments list exists for Project 1 persistence
     comments = [analysis] if analysis else []
-    
+
     return {
         "audit_id": str(uuid.uuid4()),
         "status": status,
-        "compliance_score": score,
+        "compliance_score": min(max(score, 0.0), 1.0),
         "comments": comments,
         "mode": "GEN_AI" if used_agent else "RULE_BASED"
     }
 
+async def run_audit(decision_reason: str, applicant_data: dict) -> dict:
+    # Try AI Agent; a failed call or an unusable answer both fall back to rules
+    try:
+        result = await get_ai_audit_decision(decision_reason, applicant_data)
+        return build_audit_response(result, used_agent=True)
+    except Exception as e:
+        logger.warning(f"AI Agent failed, falling back to rules. Error: {e}")
+
+    result = get_rule_based_decision(decision_reason, applicant_data)
+    return build_audit_response(result, used_agent=False)
+
+@app.post("/audit", response_model=AuditResponse)
+async def perform_audit(audit_request: AuditRequest):
+    return await run_audit(audit_request.decision_reason, audit_request.applicant_data.model_dump(mode="json"))
+
+@app.post(
+    "/audit/msgpack",
+    response_class=Response,
+    responses={200: {"content": {MSGPACK_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/AuditResponse"}}}}},
+    openapi_extra={"requestBody": {"required": True, "content": {
+        MSGPACK_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/AuditRequest"}}
+    }}}
+)
+async def perform_audit_msgpack(request: Request):
+    """Internal binary transport: same contract as /audit, msgpack-encoded both ways."""
+    try:
+        audit_request = AuditRequest.model_validate(msgpack.unpackb(await request.body()))
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except (ValueError, msgpack.UnpackException) as e:
+        raise RequestValidationError([{"loc": ["body"], "msg": f"Invalid msgpack body: {e}", "type": "value_error"}])
+
+    response = await run_audit(audit_request.decision_reason, audit_request.applicant_data.model_dump(mode="json"))
+    return Response(content=msgpack.packb(response), media_type=MSGPACK_MEDIA_TYPE)
+
+@app.post(
+    "/audit/batch",
+    openapi_extra={"requestBody": {"required": True, "content": {"application/json": {"schema": {
+        "type": "array", "items": {"$ref": "#/components/schemas/AuditRequest"}, "maxItems": AUDIT_MAX_BATCH_SIZE
+    }}}}}
+)
+async def perform_batch_audit(request: Request):
+    """
+    Audit many decisions in one call. Rule-based checks run vectorized up front;
+    GEN_AI audits share the LLM concurrency limit. Results stream back as NDJSON
+    (one `{"index": i, ...}` line per item) in completion order. Batches larger than
+    `AUDIT_MAX_BATCH_SIZE` are rejected with 413 before any item is validated.
+    """
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError as e:
+        raise RequestValidationError([{"loc": ["body"], "msg": str(e), "type": "json_invalid"}])
+    if isinstance(payload, list) and len(payload) > AUDIT_MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {AUDIT_MAX_BATCH_SIZE} audits")
+    try:
+        audit_requests = audit_batch_adapter.validate_python(payload)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ["body", *error["loc"]]} for error in e.errors(include_url=False)])
+
+    decision_reasons = [request.decision_reason for request in audit_requests]
+    applicant_data = [request.applicant_data.model_dump(mode="json") for request in audit_requests]
+    rule_results = get_rule_based_decisions(decision_reasons, applicant_data)
+
+    def encode(index: int, response: dict) -> bytes:
+        return orjson.dumps({"index": index, **response}) + b"\n"
+
+    async def audit_item(index: int):
+        try:
+            result = await get_ai_audit_decision(decision_reasons[index], applicant_data[index])
+            return index, build_audit_response(result, True)
+        except Exception as e:
+            logger.warning(f"AI Agent failed for batch item {index}, falling back to rules. Error: {e}")
+            return index, build_audit_response(rule_results[index], False)
+
+    async def stream():
+        if not GEMINI_API_KEY:
+            for index, result in enumerate(rule_results):
+                yield encode(index, build_audit_response(result, False))
+            return
+
+        tasks = [asyncio.ensure_future(audit_item(index)) for index in range(len(audit_requests))]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                index, response = await completed
+                yield encode(index, response)
+        finally:
+            # Client went away: don't keep spending LLM quota on abandoned items
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
@@ -0,0 +1,123 @@
+from fastapi.testclient import TestClient
+from services.compliance_auditor.app import main as auditor
+from services.compliance_auditor.app.main import app
+from unittest.mock import patch, AsyncMock
+import json
+
+client = TestClient(app)
+
+def applicant(credit_score):
+    return {"applicant_income": 50000, "credit_score": credit_score, "loan_amount": 10000, "employment_status": "employed"}
+
+def test_health_check():
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+def test_rule_based_batch_matches_single():
+    reasons = ["", "Applicant is currently self-employed", "Met all criteria", "Employment status required"]
+    data = [{"credit_score": 780}, {"credit_score": 780}, {"credit_score": 780}, {"credit_score": 650}]
+    batch = auditor.get_rule_based_decisions(reasons, data)
+    single = [auditor.get_rule_based_decision(r, d) for r, d in zip(reasons, data)]
+    assert batch == single
+    assert [r["status"] for r in batch] == ["FLAGGED", "FLAGGED", "CLEARED", "CLEARED"]
+
+@patch.object(auditor, "GEMINI_API_KEY", None)
+def test_batch_audit_streams_ndjson_rule_based():
+    payload = [
+        {"decision_reason": "Applicant is currently self-employed", "applicant_data": applicant(780)},
+        {"decision_reason": "Met all criteria", "applicant_data": applicant(720)},
+    ]
+    response = client.post("/audit/batch", json=payload)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    by_index = {line["index"]: line for line in lines}
+    assert by_index[0]["status"] == "FLAGGED"
+    assert by_index[1]["status"] == "CLEARED"
+    assert all(line["mode"] == "RULE_BASED" for line in lines)
+
+@patch.object(auditor, "GEMINI_API_KEY", "test-key")
+@patch.object(auditor, "get_ai_audit_decision", new_callable=AsyncMock)
+def test_batch_audit_falls_back_per_item(mock_ai):
+    async def decide(decision_reason, applicant_data):
+        if applicant_data["credit_score"] < 700:
+            raise RuntimeError("quota exceeded")
+        return {"status": "CLEARED", "compliance_score": 0.9, "detailed_analysis": "Consistent decision."}
+    mock_ai.side_effect = decide
+
+    payload = [
+        {"decision_reason": "Met all criteria", "applicant_data": applicant(780)},
+        {"decision_reason": "Credit score below 600", "applicant_data": applicant(550)},
+    ]
+    response = client.post("/audit/batch", json=payload)
+    by_index = {line["index"]: line for line in map(json.loads, response.text.splitlines())}
+    assert by_index[0]["mode"] == "GEN_AI"
+    assert by_index[1]["mode"] == "RULE_BASED"
+
+@patch.object(auditor, "GEMINI_API_KEY", "test-key")
+@patch.object(auditor, "get_ai_audit_decision", new_callable=AsyncMock)
+def test_audit_falls_back_on_malformed_llm_output(mock_ai):
+    payload = {"decision_reason": "Applicant is currently self-employed", "applicant_data": applicant(780)}
+    for malformed in (
+        {"status": "CLEARED", "compliance_score": "high", "detailed_analysis": "ok"},
+        {"status": ["CLEARED"], "compliance_score": 0.9, "detailed_analysis": "ok"},
+        {"status": "CLEARED", "compliance_score": 0.9, "detailed_analysis": {"text": "ok"}},
+        ["not", "an", "object"],
+    ):
+        mock_ai.return_value = malformed
+        response = client.post("/audit", json=payload)
+        assert response.status_code == 200
+        assert response.json()["mode"] == "RULE_BASED"
+        assert response.json()["status"] == "FLAGGED"
+
+    mock_ai.return_value = {"status": "CLEARED", "compliance_score": "0.9", "detailed_analysis": "ok"}
+    data = client.post("/audit", json=payload).json()
+    assert data["mode"] == "GEN_AI" and data["compliance_score"] == 0.9
+
+@patch.object(auditor, "GEMINI_API_KEY", None)
+def test_audit_json_contract_unchanged():
+    response = client.post("/audit", json={
+        "decision_reason": "Applicant is currently self-employed",
+        "applicant_data": applicant(780)
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data) == {"audit_id", "status", "compliance_score", "comments", "mode"}
+    assert data["status"] == "FLAGGED"
+
+@patch.object(auditor, "GEMINI_API_KEY", None)
+def test_audit_msgpack_transport():
+    import msgpack
+    body = msgpack.packb({"decision_reason": "Met all criteria", "applicant_data": applicant(720)})
+    response = client.post("/audit/msgpack", content=body, headers={"Content-Type": "application/msgpack"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    data = msgpack.unpackb(response.content)
+    assert data["status"] == "CLEARED"
+    assert data["mode"] == "RULE_BASED"
+
+    invalid = client.post("/audit/msgpack", content=msgpack.packb({"decision_reason": 42}))
+    assert invalid.status_code == 422
+    garbage = client.post("/audit/msgpack", content=b"\xc1")
+    assert garbage.status_code == 422
+
+@patch.object(auditor, "GEMINI_API_KEY", None)
+def test_malformed_applicant_data_is_422():
+    assert client.post("/audit", json={
+        "decision_reason": "Met all criteria", "applicant_data": {**applicant(720), "credit_score": None}
+    }).status_code == 422
+
+    batch = [
+        {"decision_reason": "Met all criteria", "applicant_data": applicant(720)},
+        {"decision_reason": "Met all criteria", "applicant_data": {**applicant(720), "credit_score": "abc"}},
+    ]
+    response = client.post("/audit/batch", json=batch)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][:4] == ["body", 1, "applicant_data", "credit_score"]
+
+def test_batch_audit_rejects_oversized_batch():
+    item = {"decision_reason": "Met all criteria", "applicant_data": applicant(720)}
+    with patch.object(auditor, "AUDIT_MAX_BATCH_SIZE", 2):
+        assert client.post("/audit/batch", json=[item] * 3).status_code == 413
+        assert client.post("/audit/batch", json=[item] * 2).status_code == 200
@@ -1,8 +1,6 @@
 import streamlit as st
 import httpx
 import pandas as pd
-import json
-import time
 import plotly.graph_objects as go
 
 # --- Page Config ---
@@ -128,14 +126,142 @@ with st.sidebar:
     with c6: st.caption("Immutable Ledger (SQLite)")
 
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Constants ---
 API_URL = os.getenv("API_URL", "http://127.0.0.1:8000/api/v1")
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "200"))
+BATCH_COLUMNS = ["applicant_income", "credit_score", "loan_amount", "employment_status"]
+HISTORY_LIMIT = int(os.getenv("HISTORY_LIMIT", "5000"))
+HISTORY_TABLE_HEIGHT = 420
+HISTORY_COLUMNS = ["timestamp", "decision", "credit_score", "applicant_income", "audit_status"]
+
+# Stage labels for the server-side timings returned by /predict
+AUDIT_STAGES = [
+    ("inference", "Inference: Calculated Probability of Default (PD)"),
+    ("compliance_audit", "Compliance: Consulted 'Gemini-Flash' for Regulatory Review"),
+    ("ledger_commit", "Finalizing: Committed Decision to Immutable Ledger"),
+]
+
+# --- Shared Resources ---
+@st.cache_resource
+def get_http_client() -> httpx.Client:
+    """One pooled, keep-alive client shared by every session and rerun."""
+    return httpx.Client(
+        base_url=API_URL,
+        timeout=httpx.Timeout(12.0, connect=3.0),
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+    )
+
+@st.cache_resource
+def get_batch_executor() -> ThreadPoolExecutor:
+    """Background workers so bulk scoring never runs on the script thread."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="fincore-batch")
+
+def run_batch_job(records: list, progress: dict) -> list:
+    """Score records in chunks against /predict/batch, updating progress as chunks land."""
+    client = get_http_client()
+    results = []
+    for offset in range(0, len(records), BATCH_CHUNK_SIZE):
+        chunk = records[offset:offset + BATCH_CHUNK_SIZE]
+        response = client.post("/predict/batch", json=chunk, timeout=120.0)
+        response.raise_for_status()
+        results.extend(response.json()["results"])
+        progress["done"] = len(results)
+    return results
+
+@st.cache_resource(max_entries=64)
+def build_risk_gauge(pd_value: float, approved: bool) -> go.Figure:
+    """Gauge figures are rebuilt only when the decision being shown changes."""
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = pd_value * 100,
+        title = {'text': "Est. Probability of Default (%)"},
+        gauge = {
+            'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "#334155"},
+            'bar': {'color': "#ef4444" if not approved else "#22c55e"},
+            'bgcolor': "#FFFFFF",
+            'borderwidth': 2,
+            'bordercolor': "#E2E8F0",
+            'steps': [
+                {'range': [0, 20], 'color': '#d1fae5'}, # Light Green
+                {'range': [20, 50], 'color': '#fef08a'}, # Light Yellow
+                {'range': [50, 100], 'color': '#fecaca'} # Light Red
+            ],
+        }
+    ))
+    fig.update_layout(
+        paper_bgcolor="#FFFFFF",
+        font={'color': "#0F172A", 'family': "Arial"},
+        margin=dict(l=20, r=20, t=50, b=20),
+        height=250
+    )
+    return fig
+
+@st.cache_resource
+def get_history_store() -> dict:
+    """Process-wide history frame, grown incrementally as the ledger cursor advances."""
+    return {"lock": threading.Lock(), "synced": None, "cursor": None, "frame": pd.DataFrame(columns=HISTORY_COLUMNS)}
+
+@st.cache_data(ttl=2, show_spinner=False)
+def fetch_ledger_summary() -> dict:
+    """Aggregated ledger stats; the embedded cursor keys every downstream cache."""
+    response = get_http_client().get("/history/summary", timeout=5.0)
+    response.raise_for_status()
+    return response.json()
+
+def sync_history_frame(cursor) -> pd.DataFrame:
+    """
+    Fetch only records newer than the cached cursor and prepend them to the frame.
+    `cursor` (from the cached summary) only triggers a sync; the stored cursor is the
+    newest timestamp actually fetched, since rows committed after the summary was
+    taken are already in this delta and must not be fetched again.
+    """
+    store = get_history_store()
+    with store["lock"]:
+        if cursor is not None and cursor != store["synced"]:
+            params = {"limit": HISTORY_LIMIT}
+            if store["cursor"] is not None:
+                params["since"] = store["cursor"]
+            response = get_http_client().get("/history", params=params, timeout=5.0)
+            response.raise_for_status()
+            records = response.json()
+            if records:
+                delta = pd.DataFrame(records, columns=HISTORY_COLUMNS)
+                delta["timestamp"] = pd.to_datetime(delta["timestamp"]).dt.strftime('%H:%M:%S UTC')
+                frame = pd.concat([delta, store["frame"]], ignore_index=True) if not store["frame"].empty else delta
+                store["frame"] = frame.head(HISTORY_LIMIT)
+                store["cursor"] = max(record["timestamp"] for record in records)
+            store["synced"] = cursor
+        return store["frame"]
+
+@st.cache_resource(max_entries=8)
+def build_sparkline(series: tuple) -> go.Figure:
+    """Approval-rate sparkline, rebuilt only when the aggregated series changes."""
+    fig = go.Figure(go.Scatter(
+        x=[bucket for bucket, _ in series],
+        y=[rate * 100 for _, rate in series],
+        mode="lines",
+        line={'color': "#0F172A", 'width': 2},
+        hovertemplate="%{x}<br>Approval: %{y:.1f}%<extra></extra>"
+    ))
+    fig.update_layout(
+        paper_bgcolor="#FFFFFF",
+        plot_bgcolor="#FFFFFF",
+        margin=dict(l=0, r=0, t=0, b=0),
+        height=70,
+        xaxis={'visible': False},
+        yaxis={'visible': False, 'range': [0, 100]}
+    )
+    return fig
 
 # --- Main Logic ---
 
 if "last_result" not in st.session_state:
     st.session_state.last_result = None
+if "batch_job" not in st.session_state:
+    st.session_state.batch_job = None
 
 # Logic: Audit Trigger
 if submit_button:
@@ -147,18 +273,20 @@ if submit_button:
     }
     
     try:
-        # Dynamic Agent Simulation
-        with st.status("🔍 Initializing FinCore Audit Protocol...", expanded=True) as status:
-            st.write("Validation: Checking Schema & AML Watchlists...")
-            time.sleep(0.4) 
-            
-            st.write("Inference: Calculating Probability of Default (PD)...")
-            time.sleep(0.4) 
-            
-            st.write("Compliance: Consulted 'Gemini-Flash' for Regulatory Review...")
-            response = httpx.post(f"{API_URL}/predict", json=payload, timeout=12.0)
-            
-            st.write("Finalizing: Committing Decision to Immutable Ledger.")
+        with st.status("🔍 Running FinCore Audit Protocol...", expanded=True) as status:
+            response = get_http_client().post("/predict", json=payload)
+
+            # Replay the real stage timings reported by the Inference Engine
+            timings = response.json().get("stage_timings_ms", {}) if response.status_code == 200 else {}
+            total_ms = sum(timings.values()) or 1.0
+            progress = st.progress(0.0)
+            elapsed_ms = 0.0
+            for stage, label in AUDIT_STAGES:
+                if stage in timings:
+                    elapsed_ms += timings[stage]
+                    st.write(f"{label} ({timings[stage]:.0f} ms)")
+                    progress.progress(min(elapsed_ms / total_ms, 1.0))
+
             status.update(label="Audit Cycle Complete", state="complete", expanded=False)
             
         if response.status_code == 200:
@@ -175,7 +303,7 @@ if submit_button:
     except httpx.ConnectError:
         st.error("❌ CRTICAL: Connection to Microservices Failed.")
         st.session_state.last_result = None
-    except httpx.TimeoutError:
+    except httpx.TimeoutException:
         st.error("❌ TIMEOUT: Auditor did not respond in time.")
         st.session_state.last_result = None
     except Exception as e:
@@ -204,30 +332,8 @@ if st.session_state.last_result:
     col_gauge, col_report = st.columns([1, 2])
     
     with col_gauge:
-        # Plotly Gauge for Probability of Default
-        fig = go.Figure(go.Indicator(
-            mode = "gauge+number",
-            value = pd_value * 100,
-            title = {'text': "Est. Probability of Default (%)"},
-            gauge = {
-                'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "#334155"},
-                'bar': {'color': "#ef4444" if not approved else "#22c55e"},
-                'bgcolor': "#FFFFFF",
-                'borderwidth': 2,
-                'bordercolor': "#E2E8F0",
-                'steps': [
-                    {'range': [0, 20], 'color': '#d1fae5'}, # Light Green
-                    {'range': [20, 50], 'color': '#fef08a'}, # Light Yellow
-                    {'range': [50, 100], 'color': '#fecaca'} # Light Red
-                ],
-            }
-        ))
-        fig.update_layout(
-            paper_bgcolor="#FFFFFF",
-            font={'color': "#0F172A", 'family': "Arial"},
-            margin=dict(l=20, r=20, t=50, b=20),
-            height=250
-        )
+        # Plotly Gauge for Probability of Default (cached per decision)
+        fig = build_risk_gauge(round(pd_value, 4), approved)
         st.plotly_chart(fig, use_container_width=True)
         
         # Decision Badge
@@ -267,6 +373,54 @@ if st.session_state.last_result:
 elif not st.session_state.last_result:
     st.info("👈 Enter applicant details and click 'Initiate Risk Audit' to begin.")
 
+# --- Bulk Scoring: CSV Upload ---
+st.subheader("📦 Bulk Batch Scoring")
+
+with st.expander("Upload CSV → Batch Score", expanded=st.session_state.batch_job is not None):
+    st.caption(f"Required columns: {', '.join(BATCH_COLUMNS)}")
+    uploaded = st.file_uploader("Applications CSV", type=["csv"], label_visibility="collapsed")
+
+    job = st.session_state.batch_job
+    job_running = job is not None and not job["future"].done()
+
+    if uploaded is not None and st.button("Score Batch", disabled=job_running):
+        batch_df = pd.read_csv(uploaded)
+        missing = [c for c in BATCH_COLUMNS if c not in batch_df.columns]
+        if missing:
+            st.error(f"Missing columns: {', '.join(missing)}")
+        else:
+            records = batch_df[BATCH_COLUMNS].to_dict(orient="records")
+            progress = {"done": 0, "total": len(records)}
+            st.session_state.batch_job = {
+                "future": get_batch_executor().submit(run_batch_job, records, progress),
+                "progress": progress,
+                "input": batch_df[BATCH_COLUMNS],
+            }
+            job = st.session_state.batch_job
+
+    if job is not None:
+        progress = job["progress"]
+        if not job["future"].done():
+            st.progress(progress["done"] / max(progress["total"], 1))
+            st.caption(f"Scored {progress['done']} / {progress['total']} applications.")
+            st.button("🔄 Refresh Progress")
+        elif job["future"].exception() is not None:
+            st.error(f"Batch scoring failed: {job['future'].exception()}")
+        else:
+            results = pd.DataFrame(job["future"].result())
+            output = job["input"].reset_index(drop=True).assign(
+                approved=results["approved"],
+                confidence_score=results["confidence_score"],
+                audit_status=results["audit_analysis"].map(lambda a: (a or {}).get("status", "OFFLINE")),
+            )
+            st.success(f"Scored {len(output)} applications.")
+            st.dataframe(output, hide_index=True, use_container_width=True)
+            st.download_button(
+                "Download Results", output.to_csv(index=False), file_name="fincore_batch_results.csv"
+            )
+
+st.markdown("---")
+
 # --- Bottom Section: Audit Log ---
 st.subheader("📜 Global Audit Log (Immutable)")
 
@@ -276,29 +430,37 @@ with col_hist_ctrl:
         st.rerun()
 
 try:
-    history_response = httpx.get(f"{API_URL}/history", timeout=5.0)
-    if history_response.status_code == 200:
-        records = history_response.json()
-        if records:
-            df = pd.DataFrame(records)
-            df = df[["timestamp", "decision", "credit_score", "applicant_income", "audit_status"]].copy()
-            df["timestamp"] = pd.to_datetime(df["timestamp"]).dt.strftime('%H:%M:%S UTC')
-            
-            st.dataframe(
-                df, 
-                hide_index=True, 
-                use_container_width=True,
-                column_config={
-                    "timestamp": "Timestamp",
-                    "decision": st.column_config.TextColumn("Verdict", width="small"),
-                    "credit_score": "FICO",
-                    "applicant_income": st.column_config.NumberColumn("Income", format="£%d"),
-                    "audit_status": st.column_config.TextColumn("Compliance", width="medium")
-                }
-            )
-        else:
-            st.caption("No records in current session.")
+    summary = fetch_ledger_summary()
+    history_df = sync_history_frame(summary["cursor"])
+
+    # Precomputed summary panel (aggregated server-side, size independent of ledger)
+    col_m1, col_m2, col_m3, col_spark = st.columns([1, 1, 1, 3])
+    col_m1.metric("Decisions", f"{summary['total_records']:,}")
+    col_m2.metric("Approval Rate", f"{summary['approval_rate']:.1%}")
+    col_m3.metric("Flagged Ratio", f"{summary['flagged_ratio']:.1%}")
+    with col_spark:
+        series = tuple((p["bucket"], p["approval_rate"]) for p in summary["approval_rate_series"])
+        if series:
+            st.plotly_chart(build_sparkline(series), use_container_width=True, config={"displayModeBar": False})
+
+    if not history_df.empty:
+        # Fixed height keeps the grid virtualized: only visible rows are painted
+        st.dataframe(
+            history_df,
+            hide_index=True,
+            use_container_width=True,
+            height=HISTORY_TABLE_HEIGHT,
+            column_config={
+                "timestamp": "Timestamp",
+                "decision": st.column_config.TextColumn("Verdict", width="small"),
+                "credit_score": "FICO",
+                "applicant_income": st.column_config.NumberColumn("Income", format="£%d"),
+                "audit_status": st.column_config.TextColumn("Compliance", width="medium")
+            }
+        )
     else:
-        st.warning("Ledger connection failed.")
+        st.caption("No records in current session.")
+except httpx.HTTPStatusError:
+    st.warning("Ledger connection failed.")
 except Exception as e:
     st.warning(f"Ledger unavailable: {str(e)}")
@@ -0,0 +1,173 @@
+"""
+Admission control and load shedding.
+
+Requests are rejected up front with `503` + `Retry-After` when any of these
+signals is over its limit, so admitted requests keep bounded latency instead of
+every request timing out together:
+
+* event-loop lag (`ADMISSION_MAX_LOOP_LAG_MS`), measured by a background task
+  that checks how late its own periodic wake-ups are;
+* in-flight requests (`ADMISSION_MAX_INFLIGHT`);
+* DB saturation (`ADMISSION_MAX_DB_POOL_SATURATION`, 0-1), when the service
+  supplies a gauge for it.
+
+Health checks and callers presenting `X-Admission-Priority: <ADMISSION_PRIORITY_TOKEN>`
+are always admitted. Counters are served on `GET /admission`. Set
+`ADMISSION_ENABLED=false` to install nothing. Keep this module identical across services.
+"""
+import asyncio
+import hmac
+import os
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+EXEMPT_PATHS = {"/health", "/admission"}
+
+
+class LoopLagMonitor:
+    """Smoothed event-loop lag: how late a periodic `asyncio.sleep` wakes up."""
+
+    def __init__(self, interval: float = 0.05, smoothing: float = 0.3):
+        self.interval = interval
+        self.smoothing = smoothing
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = max((time.perf_counter() - started - self.interval) * 1000, 0.0)
+            self.lag_ms += self.smoothing * (lag_ms - self.lag_ms)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class AdmissionController:
+    def __init__(self, max_inflight: int, max_loop_lag_ms: float, max_db_pool_saturation: float,
+                 retry_after_s: int, priority_token: Optional[str] = None,
+                 db_pool_saturation: Optional[Callable[[], float]] = None,
+                 monitor: Optional[LoopLagMonitor] = None):
+        self.max_inflight = max_inflight
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.max_db_pool_saturation = max_db_pool_saturation
+        self.retry_after_s = retry_after_s
+        self.priority_token = priority_token
+        self.db_pool_saturation = db_pool_saturation
+        self.monitor = monitor or LoopLagMonitor()
+        self.inflight = 0
+        self.admitted = 0
+        self.shed: Counter = Counter()
+
+    @classmethod
+    def from_env(cls, db_pool_saturation: Optional[Callable[[], float]] = None) -> "AdmissionController":
+        return cls(
+            max_inflight=int(os.getenv("ADMISSION_MAX_INFLIGHT", "256")),
+            max_loop_lag_ms=float(os.getenv("ADMISSION_MAX_LOOP_LAG_MS", "200")),
+            max_db_pool_saturation=float(os.getenv("ADMISSION_MAX_DB_POOL_SATURATION", "1.0")),
+            retry_after_s=int(os.getenv("ADMISSION_RETRY_AFTER_S", "1")),
+            priority_token=os.getenv("ADMISSION_PRIORITY_TOKEN") or None,
+            db_pool_saturation=db_pool_saturation,
+        )
+
+    def is_exempt(self, request: Request) -> bool:
+        if request.url.path in EXEMPT_PATHS:
+            return True
+        presented = request.headers.get("X-Admission-Priority")
+        return bool(self.priority_token) and presented is not None and hmac.compare_digest(
+            presented.encode(), self.priority_token.encode()
+        )
+
+    def rejection_reason(self) -> Optional[str]:
+        if self.inflight >= self.max_inflight:
+            return "inflight"
+        if self.monitor.lag_ms > self.max_loop_lag_ms:
+            return "loop_lag"
+        if self.db_pool_saturation is not None and self.db_pool_saturation() >= self.max_db_pool_saturation:
+            return "db_pool"
+        return None
+
+    def snapshot(self) -> Dict:
+        return {
+            "inflight": self.inflight,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "shed_total": sum(self.shed.values()),
+            "loop_lag_ms": round(self.monitor.lag_ms, 2),
+            "max_loop_lag_ms_observed": round(self.monitor.max_lag_ms, 2),
+            "db_pool_saturation": round(self.db_pool_saturation(), 3) if self.db_pool_saturation else None,
+            "limits": {
+                "max_inflight": self.max_inflight,
+                "max_loop_lag_ms": self.max_loop_lag_ms,
+                "max_db_pool_saturation": self.max_db_pool_saturation,
+            },
+        }
+
+
+class AdmissionMiddleware:
+    """Pure ASGI: a request holds its in-flight slot until the last body chunk is sent."""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        controller = self.controller
+        if scope["type"] != "http" or controller.is_exempt(Request(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        reason = controller.rejection_reason()
+        if reason is not None:
+            controller.shed[reason] += 1
+            response = JSONResponse(
+                status_code=503,
+                headers={"Retry-After": str(controller.retry_after_s)},
+                content={
+                    "error": "Service Overloaded",
+                    "message": "Request shed by admission control. Retry after the indicated delay.",
+                    "reason": reason
+                }
+            )
+            await response(scope, receive, send)
+            return
+
+        controller.admitted += 1
+        controller.inflight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.inflight -= 1
+
+
+def install_admission_control(app: FastAPI, db_pool_saturation: Optional[Callable[[], float]] = None) -> Optional[AdmissionController]:
+    """Add the admission middleware, lag monitor lifecycle and `GET /admission` to `app`."""
+    if os.getenv("ADMISSION_ENABLED", "true").lower() != "true":
+        return None
+
+    controller = AdmissionController.from_env(db_pool_saturation)
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    app.add_event_handler("startup", controller.monitor.start)
+    app.add_event_handler("shutdown", controller.monitor.stop)
+
+    @app.get("/admission", tags=["Health"])
+    async def admission_stats():
+        return controller.snapshot()
+
+    app.state.admission = controller
+    return controller
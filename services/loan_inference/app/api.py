@@ -1,25 +1,51 @@
-from fastapi import APIRouter, HTTPException, Request
-from .models import LoanApplication, PredictionResponse
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from .models import (
+    LoanApplication, PredictionResponse, BatchPredictionResponse, HistorySummary, ApprovalRatePoint,
+    ShadowModelReport, ShadowReport
+)
+import os
 import random
 import logging
+import time
 import httpx
+import orjson
+import msgpack
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import numpy as np
 from fastapi import Depends
+from fastapi.exceptions import RequestValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, func
 from sqlalchemy.future import select
 from .database import get_db
-from .db_models import LoanRecord
+from .db_models import LoanRecord, ShadowComparison
+from .batch import LoanApplicationBatch, BatchValidationError, payload_rows
+from .auditor_client import auditor_pool
+from .audit_schema import AuditRequest, MSGPACK_MEDIA_TYPE
+from .shadow import shadow_scorer
+from .drift import drift_monitor
+from .ledger import append_records, verify_range
 import json
 
 router = APIRouter()
+logger = logging.getLogger()
 
-@router.post("/predict", response_model=PredictionResponse, summary="Predict Loan Approval")
-async def predict_loan(application: LoanApplication, db: AsyncSession = Depends(get_db)):
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+MAX_HISTORY_LIMIT = int(os.getenv("MAX_HISTORY_LIMIT", "5000"))
+JSON_HEADERS = {"Content-Type": "application/json"}
+MSGPACK_HEADERS = {"Content-Type": MSGPACK_MEDIA_TYPE, "Accept": MSGPACK_MEDIA_TYPE}
+
+
+def score_application(application: LoanApplication):
     """
     Simulate a loan approval prediction model.
+    Returns (approved, confidence, reasons).
     """
     # Dummy logic simulation
     # In a real scenario, this would load a model and run inference
-    
+
     score = 0
     if application.credit_score > 700:
         score += 0.5
@@ -27,11 +53,11 @@ async def predict_loan(application: LoanApplication, db: AsyncSession = Depends(
         score += 0.3
     if application.employment_status == "employed":
         score += 0.2
-        
+
     # Add some randomness for simulation
     confidence = min(score + random.uniform(-0.1, 0.1), 1.0) # nosec
     approved = confidence > 0.6
-    
+
     reasons = []
     if not approved:
         if application.credit_score <= 600:
@@ -40,74 +66,357 @@ async def predict_loan(application: LoanApplication, db: AsyncSession = Depends(
             reasons.append("Income too low for loan amount")
         if application.employment_status not in ["employed", "self_employed"]:
             reasons.append("Employment status required")
-            
-    # Struct log info
-    import logging
-    logger = logging.getLogger()
-    logger.info("Prediction made", extra={
-        "approved": approved,
-        "confidence": confidence,
-        "loan_amount": application.loan_amount
-    })
 
-    # --- golden Link: Call Compliance Auditor ---
-    audit_data = None
+    return approved, confidence, reasons
+
+
+def audit_request_body(applicant_json: bytes, reasons: List[str]) -> bytes:
+    """
+    Serialize the auditor request exactly once. `applicant_json` is already-encoded
+    JSON (from `model_dump_json` or orjson), so it is spliced in rather than re-encoded.
+    """
+    decision_reason = reasons[0] if reasons else "Met all criteria"
+    return b'{"decision_reason":' + orjson.dumps(decision_reason) + b',"applicant_data":' + applicant_json + b'}'
+
+
+async def request_audit(application: LoanApplication, reasons: List[str]):
+    """Call the Compliance Auditor. Returns the audit payload or None if it is unavailable."""
     try:
-        import os
-        auditor_url = os.getenv("AUDITOR_URL", "http://127.0.0.1:8001/audit")
-        
-        decision_reason = reasons[0] if reasons else "Met all criteria"
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                auditor_url,
-                json={
-                    "decision_reason": decision_reason,
-                    "applicant_data": application.model_dump()
-                },
+        if auditor_pool.transport == "msgpack":
+            audit_request = AuditRequest(
+                decision_reason=reasons[0] if reasons else "Met all criteria",
+                applicant_data=application.model_dump(mode="json")
+            )
+            response = await auditor_pool.post(
+                suffix="/msgpack",
+                content=msgpack.packb(audit_request.model_dump()),
+                headers=MSGPACK_HEADERS,
                 timeout=10.0
             )
             if response.status_code == 200:
-                audit_data = response.json()
-            else:
-                logger.error(f"Auditor returned {response.status_code}", extra={"body": response.text})
+                return msgpack.unpackb(response.content)
+        else:
+            response = await auditor_pool.post(
+                content=audit_request_body(application.model_dump_json().encode(), reasons),
+                headers=JSON_HEADERS,
+                timeout=10.0
+            )
+            if response.status_code == 200:
+                return response.json()
+        logger.error(f"Auditor returned {response.status_code}", extra={"body": response.text})
     except httpx.TimeoutException as e:
         logger.warning(f"Auditor timed out (GenAI Latency), proceeding with internal check only. Error: {str(e)}")
-        audit_data = None
     except Exception as e:
         logger.warning(f"Auditor unavailable, proceeding with internal check only. Error: {str(e)}")
-        audit_data = None
+    return None
+
+
+async def request_batch_audit(bodies: List[bytes]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Audit a whole batch in one call to the auditor's NDJSON endpoint. Lines arrive
+    as each item finishes and are slotted back by index; items that never arrive
+    (auditor down, stream cut short) stay None and are recorded as OFFLINE.
+    """
+    audits: List[Optional[Dict[str, Any]]] = [None] * len(bodies)
+    try:
+        async with auditor_pool.stream(
+            "/batch",
+            content=b"[" + b",".join(bodies) + b"]",
+            headers=JSON_HEADERS,
+            timeout=httpx.Timeout(10.0, read=30.0)
+        ) as response:
+            if response.status_code != 200:
+                logger.error(f"Batch auditor returned {response.status_code}")
+                return audits
+            async for line in response.aiter_lines():
+                if line:
+                    item = orjson.loads(line)
+                    audits[item.pop("index")] = item
+    except httpx.TimeoutException as e:
+        logger.warning(f"Batch auditor timed out, unfinished items recorded as OFFLINE. Error: {str(e)}")
+    except Exception as e:
+        logger.warning(f"Batch auditor unavailable, unfinished items recorded as OFFLINE. Error: {str(e)}")
+    return audits
+
+
+def audit_fields(audit_data) -> Dict[str, str]:
+    audit_status = "OFFLINE"
+    audit_comments_str = ""
+
+    if audit_data:
+        audit_status = audit_data.get("status", "UNKNOWN")
+        comments = audit_data.get("comments", [])
+        audit_comments_str = json.dumps(comments) if comments else ""
+
+    return {"audit_status": audit_status, "audit_comments": audit_comments_str}
+
+
+def build_record(application: LoanApplication, approved: bool, audit_data) -> Dict[str, Any]:
+    return {
+        "applicant_income": application.applicant_income,
+        "credit_score": application.credit_score,
+        "decision": "Approved" if approved else "Denied",
+        **audit_fields(audit_data)
+    }
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+@router.post("/predict", response_model=PredictionResponse, summary="Predict Loan Approval")
+async def predict_loan(application: LoanApplication, db: AsyncSession = Depends(get_db)):
+    """
+    Simulate a loan approval prediction model.
+    """
+    stage_timings = {}
+
+    started = time.perf_counter()
+    approved, confidence, reasons = score_application(application)
+    stage_timings["inference"] = _elapsed_ms(started)
+
+    # Struct log info
+    logger.info("Prediction made", extra={
+        "approved": approved,
+        "confidence": confidence,
+        "loan_amount": application.loan_amount
+    })
+
+    # --- golden Link: Call Compliance Auditor ---
+    started = time.perf_counter()
+    audit_data = await request_audit(application, reasons)
+    stage_timings["compliance_audit"] = _elapsed_ms(started)
 
     # --- Persistence: Save to Database ---
+    started = time.perf_counter()
+    db_record = build_record(application, approved, audit_data)
     try:
-        audit_status = "OFFLINE"
-        audit_comments_str = ""
-        
-        if audit_data:
-            audit_status = audit_data.get("status", "UNKNOWN")
-            comments = audit_data.get("comments", [])
-            audit_comments_str = json.dumps(comments) if comments else ""
-        
-        db_record = LoanRecord(
-            applicant_income=application.applicant_income,
-            credit_score=application.credit_score,
-            decision="Approved" if approved else "Denied",
-            audit_status=audit_status,
-            audit_comments=audit_comments_str
-        )
-        db.add(db_record)
-        await db.commit()
+        await append_records(db, [db_record])
     except Exception as e:
         logger.error(f"Failed to save loan record: {str(e)}")
+    stage_timings["ledger_commit"] = _elapsed_ms(started)
+
+    # --- Drift Monitoring: constant-memory sketches, O(1) per decision ---
+    drift_monitor.observe(
+        application.credit_score, application.applicant_income, application.loan_amount,
+        confidence, application.employment_status.value, db_record["audit_status"]
+    )
+
+    # --- Shadow Scoring: challengers run off the request path (non-blocking enqueue) ---
+    if shadow_scorer.enabled:
+        shadow_scorer.submit(
+            db_record.get("id"), application.model_dump(mode="json"), approved, confidence, stage_timings["inference"]
+        )
 
-    return PredictionResponse(
+    prediction = PredictionResponse(
         approved=approved,
         confidence_score=round(confidence, 2),
         reasons=reasons,
-        audit_analysis=audit_data
+        audit_analysis=audit_data,
+        stage_timings_ms=stage_timings
     )
+    # Already validated: serialize in Rust and skip FastAPI's re-validation pass
+    return Response(content=prediction.model_dump_json(), media_type="application/json")
+
+
+@router.post(
+    "/predict/batch",
+    response_model=BatchPredictionResponse,
+    summary="Batch Predict Loan Approval",
+    openapi_extra={"requestBody": {"required": True, "content": {"application/json": {"schema": {
+        "oneOf": [
+            {"type": "array", "items": {"$ref": "#/components/schemas/LoanApplication"}},
+            {"type": "object", "description": "Columnar form: one equal-length array per LoanApplication field"}
+        ]
+    }}}}}
+)
+async def predict_loan_batch(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Score a batch of applications. The body is either a JSON array of applications or a
+    columnar object; both are loaded into a `LoanApplicationBatch` (no per-row Pydantic
+    models) and scored vectorized. The whole batch is audited with one streamed
+    `/audit/batch` call; all records are chained and inserted in a single executemany.
+    """
+    try:
+        payload = await request.json()
+    except ValueError as e:
+        raise RequestValidationError([{"loc": ["body"], "msg": str(e), "type": "json_invalid"}])
+
+    # Reject oversized batches before any per-row conversion or validation
+    if payload_rows(payload) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_SIZE} applications")
+
+    try:
+        batch = LoanApplicationBatch.from_payload(payload)
+    except ValueError as e:
+        detail = e.errors if isinstance(e, BatchValidationError) else [{"loc": ["body"], "msg": str(e), "type": "value_error"}]
+        raise RequestValidationError(detail)
+
+    stage_timings = {}
+
+    started = time.perf_counter()
+    approved, confidence = batch.score()
+    reasons = batch.reasons(approved)
+    stage_timings["inference"] = _elapsed_ms(started)
+
+    started = time.perf_counter()
+    applicant_rows = batch.to_records()
+    audits = await request_batch_audit([
+        audit_request_body(orjson.dumps(applicant_data), row_reasons)
+        for applicant_data, row_reasons in zip(applicant_rows, reasons)
+    ])
+    stage_timings["compliance_audit"] = _elapsed_ms(started)
+
+    approved_list = approved.tolist()
+    confidence_list = np.round(confidence, 2).tolist()
+
+    started = time.perf_counter()
+    db_records = [
+        {
+            "applicant_income": applicant_data["applicant_income"],
+            "credit_score": applicant_data["credit_score"],
+            "decision": "Approved" if row_approved else "Denied",
+            **audit_fields(audit_data)
+        }
+        for applicant_data, row_approved, audit_data in zip(applicant_rows, approved_list, audits)
+    ]
+    try:
+        await append_records(db, db_records)
+    except Exception as e:
+        logger.error(f"Failed to save loan batch: {str(e)}")
+    stage_timings["ledger_commit"] = _elapsed_ms(started)
+
+    drift_monitor.observe_batch(applicant_rows, confidence.tolist(), [record["audit_status"] for record in db_records])
+
+    logger.info("Batch prediction made", extra={"batch_size": len(batch)})
+
+    return ORJSONResponse({
+        "results": [
+            {
+                "approved": row_approved,
+                "confidence_score": row_confidence,
+                "reasons": row_reasons,
+                "audit_analysis": audit_data
+            }
+            for row_approved, row_confidence, row_reasons, audit_data
+            in zip(approved_list, confidence_list, reasons, audits)
+        ],
+        "stage_timings_ms": stage_timings
+    })
+
 
 @router.get("/history", summary="Get recent loan history")
-async def get_history(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(LoanRecord).order_by(LoanRecord.timestamp.desc()).limit(10))
+async def get_history(
+    since: Optional[datetime] = Query(default=None, description="Only return records newer than this ledger cursor"),
+    limit: int = Query(default=10, ge=1, le=MAX_HISTORY_LIMIT),
+    db: AsyncSession = Depends(get_db)
+):
+    query = select(LoanRecord).order_by(LoanRecord.timestamp.desc()).limit(limit)
+    if since is not None:
+        query = query.where(LoanRecord.timestamp > since)
+    result = await db.execute(query)
     records = result.scalars().all()
     return records
+
+
+@router.get("/history/summary", response_model=HistorySummary, summary="Get aggregated ledger summary")
+async def get_history_summary(
+    buckets: int = Query(default=24, ge=1, le=168, description="Number of hourly buckets in the approval-rate series"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Aggregates are computed in the database so the payload size is independent of
+    the number of records. `cursor` is the latest ledger timestamp and changes
+    whenever a new decision is committed.
+    """
+    approved = func.sum(case((LoanRecord.decision == "Approved", 1), else_=0))
+    flagged = func.sum(case((LoanRecord.audit_status == "FLAGGED", 1), else_=0))
+
+    totals = (await db.execute(
+        select(func.count(LoanRecord.id), approved, flagged, func.max(LoanRecord.timestamp))
+    )).one()
+    total, approved_count, flagged_count, cursor = totals
+
+    bucket = func.strftime("%Y-%m-%dT%H:00", LoanRecord.timestamp).label("bucket")
+    series_rows = (await db.execute(
+        select(bucket, func.count(LoanRecord.id), approved)
+        .group_by(bucket)
+        .order_by(bucket.desc())
+        .limit(buckets)
+    )).all()
+
+    return HistorySummary(
+        cursor=cursor,
+        total_records=total,
+        approval_rate=(approved_count or 0) / total if total else 0.0,
+        flagged_ratio=(flagged_count or 0) / total if total else 0.0,
+        approval_rate_series=[
+            ApprovalRatePoint(bucket=row[0], records=row[1], approval_rate=(row[2] or 0) / row[1])
+            for row in reversed(series_rows)
+        ]
+    )
+
+
+@router.get("/auditor/pool", summary="Get Compliance Auditor replica health and hedging stats")
+async def get_auditor_pool():
+    return auditor_pool.snapshot()
+
+
+@router.get("/shadow/report", response_model=ShadowReport, summary="Get champion/challenger agreement and latency")
+async def get_shadow_report(db: AsyncSession = Depends(get_db)):
+    agreed = func.avg(case((ShadowComparison.champion_approved == ShadowComparison.challenger_approved, 1.0), else_=0.0))
+    result = await db.execute(
+        select(
+            ShadowComparison.model_name,
+            func.count(ShadowComparison.id),
+            agreed,
+            func.avg(func.abs(ShadowComparison.challenger_confidence - ShadowComparison.champion_confidence)),
+            func.avg(ShadowComparison.challenger_latency_ms),
+            func.max(ShadowComparison.challenger_latency_ms),
+            func.avg(ShadowComparison.champion_latency_ms),
+        ).group_by(ShadowComparison.model_name)
+    )
+    return ShadowReport(
+        scorer=shadow_scorer.snapshot(),
+        models=[
+            ShadowModelReport(
+                model_name=row[0],
+                comparisons=row[1],
+                agreement_rate=row[2] or 0.0,
+                mean_confidence_delta=row[3] or 0.0,
+                mean_challenger_latency_ms=row[4] or 0.0,
+                max_challenger_latency_ms=row[5] or 0.0,
+                mean_champion_latency_ms=row[6] or 0.0,
+            )
+            for row in result.all()
+        ]
+    )
+
+
+@router.get("/monitoring/drift", summary="Get live feature and audit-outcome drift against the pinned baseline")
+async def get_drift_report():
+    """
+    PSI and KS per numeric feature, PSI per categorical feature and the auditor
+    FLAGGED rate, over the retained time windows. Drift fields are null until a
+    baseline has been pinned.
+    """
+    return drift_monitor.report()
+
+
+@router.post("/monitoring/drift/baseline", summary="Pin the current live distribution as the drift baseline")
+async def pin_drift_baseline():
+    return drift_monitor.pin_baseline()
+
+
+@router.get("/ledger/verify", summary="Verify the integrity of a range of the loan ledger")
+async def verify_ledger(
+    start: int = Query(default=1, ge=1, alias="from", description="First ledger sequence number to verify"),
+    end: Optional[int] = Query(default=None, ge=1, alias="to", description="Last sequence number (defaults to, and is clamped at, the chain head)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Recomputes the hash chain for `from..to` (clamped at the chain head) and checks
+    every chained checkpoint fully inside the range. Cost is proportional to the
+    range, not the table.
+    """
+    return await verify_range(db, start, end)
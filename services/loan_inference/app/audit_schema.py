@@ -0,0 +1,35 @@
+"""
+Typed contract for the loan_inference -> compliance_auditor call.
+
+Used for both the JSON endpoints and the msgpack transport (`/audit/msgpack`).
+An identical copy lives in each service, because each image ships only its own
+app package.
+"""
+from typing import List, Literal
+
+from pydantic import BaseModel, Field, conint, confloat
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+class ApplicantData(BaseModel):
+    """Mirrors loan_inference's LoanApplication, so malformed applicants are a 422 here too."""
+    applicant_income: confloat(gt=0) = Field(..., description="Annual income of the applicant in GBP")
+    credit_score: conint(ge=300, le=850) = Field(..., description="Credit score of the applicant")
+    loan_amount: confloat(gt=0) = Field(..., description="Requested loan amount in GBP")
+    employment_status: Literal["employed", "self_employed", "unemployed", "retired", "freelance"] = Field(
+        ..., description="Employment status of the applicant"
+    )
+
+
+class AuditRequest(BaseModel):
+    decision_reason: str = Field(default="", description="Primary reason given by the Inference Engine")
+    applicant_data: ApplicantData = Field(..., description="Applicant features the decision was based on")
+
+
+class AuditResponse(BaseModel):
+    audit_id: str = Field(..., description="Unique audit identifier")
+    status: str = Field(..., description="CLEARED / FLAGGED / UNKNOWN")
+    compliance_score: float = Field(..., description="Compliance score (0-1)")
+    comments: List[str] = Field(default=[], description="Auditor commentary")
+    mode: str = Field(..., description="GEN_AI or RULE_BASED")
@@ -0,0 +1,240 @@
+"""
+Client-side load balancing for Compliance Auditor replicas.
+
+`AUDITOR_URLS` (comma-separated `/audit` URLs, falling back to `AUDITOR_URL`) lists
+the replicas. Each call goes to the healthy replica with the fewest outstanding
+requests. Replicas that fail repeatedly are ejected for a cool-down period
+(passive health checking). With `AUDITOR_HEDGING` enabled, a single audit that
+is still running after the observed p95 latency is duplicated to a second
+replica, and whichever answers first wins.
+
+Transport: `AUDITOR_TRANSPORT=msgpack` sends single audits to `/audit/msgpack`
+instead of JSON. `AUDITOR_UDS` routes every call over a Unix domain socket
+(auditor on the same host, e.g. `uvicorn ... --uds`), and `AUDITOR_HTTP2=true`
+negotiates HTTP/2 with servers that support it (requires the `h2` package).
+"""
+import asyncio
+import importlib.util
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger()
+
+
+class AuditorReplica:
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def snapshot(self, now: float) -> Dict:
+        return {
+            "url": self.url,
+            "healthy": self.is_healthy(now),
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class AuditorPool:
+    def __init__(self, urls: List[str], eject_after: int = 3, eject_seconds: float = 30.0,
+                 hedging: bool = False, hedge_min_samples: int = 50, latency_window: int = 512,
+                 max_connections: int = 100, transport: str = "json", uds: Optional[str] = None,
+                 http2: bool = False):
+        if not urls:
+            raise ValueError("AuditorPool requires at least one auditor URL")
+        if transport not in ("json", "msgpack"):
+            raise ValueError(f"Unknown auditor transport: {transport}")
+        if http2 and importlib.util.find_spec("h2") is None:
+            # Fail at startup; otherwise every audit call would raise and be recorded OFFLINE
+            raise ValueError("AUDITOR_HTTP2=true requires the 'h2' package (pip install httpx[http2])")
+        self.replicas = [AuditorReplica(url) for url in urls]
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.hedging = hedging
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = deque(maxlen=latency_window)
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.max_connections = max_connections
+        self.transport = transport
+        self.uds = uds
+        self.http2 = http2
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def from_env(cls) -> "AuditorPool":
+        urls = os.getenv("AUDITOR_URLS") or os.getenv("AUDITOR_URL", "http://127.0.0.1:8001/audit")
+        return cls(
+            [url.strip() for url in urls.split(",") if url.strip()],
+            eject_after=int(os.getenv("AUDITOR_EJECT_AFTER", "3")),
+            eject_seconds=float(os.getenv("AUDITOR_EJECT_SECONDS", "30")),
+            hedging=os.getenv("AUDITOR_HEDGING", "false").lower() == "true",
+            hedge_min_samples=int(os.getenv("AUDITOR_HEDGE_MIN_SAMPLES", "50")),
+            transport=os.getenv("AUDITOR_TRANSPORT", "json").lower(),
+            uds=os.getenv("AUDITOR_UDS") or None,
+            http2=os.getenv("AUDITOR_HTTP2", "false").lower() == "true",
+        )
+
+    # --- Connection Management ---
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """One keep-alive connection pool shared by every replica and request."""
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=20)
+            self._client = httpx.AsyncClient(
+                limits=limits,
+                http2=self.http2,
+                transport=httpx.AsyncHTTPTransport(uds=self.uds, limits=limits, http2=self.http2) if self.uds else None
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # --- Balancing & Health ---
+    def pick(self, exclude: Optional[AuditorReplica] = None) -> Optional[AuditorReplica]:
+        """Least-outstanding-requests among healthy replicas; fail open if all are ejected."""
+        now = time.monotonic()
+        candidates = [r for r in self.replicas if r is not exclude and r.is_healthy(now)]
+        if not candidates:
+            if exclude is not None:
+                return None
+            # Every replica is ejected: try the one whose cool-down ends first
+            return min(self.replicas, key=lambda r: r.ejected_until)
+        fewest = min(r.outstanding for r in candidates)
+        return random.choice([r for r in candidates if r.outstanding == fewest]) # nosec
+
+    def _record(self, replica: AuditorReplica, ok: bool, latency: Optional[float] = None) -> None:
+        replica.requests += 1
+        if ok:
+            replica.consecutive_failures = 0
+            if latency is not None:
+                self.latencies.append(latency)
+            return
+        replica.failures += 1
+        replica.consecutive_failures += 1
+        if replica.consecutive_failures >= self.eject_after:
+            replica.ejected_until = time.monotonic() + self.eject_seconds
+            logger.warning(f"Ejecting auditor replica {replica.url} for {self.eject_seconds}s "
+                           f"after {replica.consecutive_failures} consecutive failures")
+
+    def hedge_delay(self) -> Optional[float]:
+        """p95 of recent successful latencies, or None until enough samples exist."""
+        if len(self.latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    # --- Requests ---
+    async def _post_to(self, replica: AuditorReplica, suffix: str = "", **kwargs) -> httpx.Response:
+        replica.outstanding += 1
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(replica.url + suffix, **kwargs)
+        except asyncio.CancelledError:
+            # Losing side of a hedge: not the replica's fault
+            replica.outstanding -= 1
+            raise
+        except Exception:
+            replica.outstanding -= 1
+            self._record(replica, False)
+            raise
+        replica.outstanding -= 1
+        self._record(replica, response.status_code < 500, time.perf_counter() - started)
+        return response
+
+    async def post(self, suffix: str = "", **kwargs) -> httpx.Response:
+        """POST to `<replica url><suffix>`, hedging to a second replica past p95."""
+        kwargs["suffix"] = suffix
+        primary = self.pick()
+        delay = self.hedge_delay() if self.hedging else None
+        if delay is None or len(self.replicas) < 2:
+            return await self._post_to(primary, **kwargs)
+
+        first = asyncio.ensure_future(self._post_to(primary, **kwargs))
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+        except asyncio.CancelledError:
+            first.cancel()
+            raise
+        if done:
+            return first.result()
+
+        secondary = self.pick(exclude=primary)
+        if secondary is None:
+            return await first
+
+        self.hedges_sent += 1
+        hedge = asyncio.ensure_future(self._post_to(secondary, **kwargs))
+        pending = {first, hedge}
+        last_error: Optional[BaseException] = None
+        last_response: Optional[httpx.Response] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    response = task.result()
+                    if response.status_code == 200:
+                        if task is hedge:
+                            self.hedges_won += 1
+                        return response
+                    last_response = response
+        finally:
+            for task in pending:
+                task.cancel()
+        if last_response is not None:
+            return last_response
+        raise last_error
+
+    @asynccontextmanager
+    async def stream(self, suffix: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Streamed POST to `<replica url><suffix>` on the least-loaded replica (no hedging)."""
+        replica = self.pick()
+        replica.outstanding += 1
+        ok = False
+        try:
+            async with self.client.stream("POST", replica.url + suffix, **kwargs) as response:
+                ok = response.status_code < 500
+                yield response
+        finally:
+            # Batch durations scale with batch size, so they stay out of the p95 window
+            replica.outstanding -= 1
+            self._record(replica, ok)
+
+    def snapshot(self) -> Dict:
+        now = time.monotonic()
+        delay = self.hedge_delay()
+        return {
+            "replicas": [replica.snapshot(now) for replica in self.replicas],
+            "hedging": self.hedging,
+            "hedge_delay_ms": round(delay * 1000, 2) if delay is not None else None,
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "transport": self.transport,
+            "uds": self.uds,
+            "http2": self.http2,
+        }
+
+
+auditor_pool = AuditorPool.from_env()
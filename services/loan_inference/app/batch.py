@@ -0,0 +1,210 @@
+"""
+Columnar (struct-of-arrays) container for bulk loan applications.
+
+The batch path never builds a `LoanApplication` per row: the four fields are held
+as contiguous NumPy arrays, validated with the same constraints as the Pydantic
+model in one vectorized pass, and scored / serialized straight from the arrays.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .models import EmploymentStatus
+
+# Enum coding for employment_status: one byte per row instead of a str per row
+EMPLOYMENT_STATUSES = [status.value for status in EmploymentStatus]
+EMPLOYMENT_CODES = {status: code for code, status in enumerate(EMPLOYMENT_STATUSES)}
+_EMPLOYED = EMPLOYMENT_CODES["employed"]
+_SELF_EMPLOYED = EMPLOYMENT_CODES["self_employed"]
+
+FIELDS = ("applicant_income", "credit_score", "loan_amount", "employment_status")
+
+
+def payload_rows(payload: Any) -> int:
+    """Row count of a raw batch payload (array or columnar form), without validating it."""
+    if isinstance(payload, list):
+        return len(payload)
+    if isinstance(payload, dict):
+        return max((len(payload[field]) for field in FIELDS if isinstance(payload.get(field), list)), default=0)
+    return 0
+
+
+class BatchValidationError(ValueError):
+    """Raised when one or more rows violate the LoanApplication constraints."""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        super().__init__(f"{len(errors)} invalid value(s) in batch")
+        self.errors = errors
+
+
+def _error(row: int, field: str, msg: str, kind: str) -> Dict[str, Any]:
+    # Mirrors FastAPI's 422 detail layout so clients handle both paths the same way
+    return {"loc": ["body", row, field], "msg": msg, "type": kind}
+
+
+def _numeric_column(values: Sequence, field: str, dtype, errors: List[Dict[str, Any]]) -> np.ndarray:
+    try:
+        column = np.asarray(values, dtype=dtype)
+        if column.ndim == 1:
+            return column
+    except (TypeError, ValueError):
+        pass
+    # Slow path: find the offending cells. Nested arrays/objects are never a valid number
+    column = np.zeros(len(values), dtype=dtype)
+    for row, value in enumerate(values):
+        try:
+            if isinstance(value, (list, tuple, dict)):
+                raise TypeError(value)
+            column[row] = value
+        except (TypeError, ValueError):
+            errors.append(_error(row, field, "Input should be a valid number", "number_parsing"))
+    return column
+
+
+class LoanApplicationBatch:
+    """Zero-copy, slice-able view over a batch of loan applications."""
+
+    __slots__ = ("applicant_income", "credit_score", "loan_amount", "employment_code")
+
+    def __init__(self, applicant_income: np.ndarray, credit_score: np.ndarray,
+                 loan_amount: np.ndarray, employment_code: np.ndarray):
+        self.applicant_income = applicant_income
+        self.credit_score = credit_score
+        self.loan_amount = loan_amount
+        self.employment_code = employment_code
+
+    # --- Construction & Validation ---
+    @classmethod
+    def from_columns(cls, applicant_income: Sequence, credit_score: Sequence,
+                     loan_amount: Sequence, employment_status: Sequence) -> "LoanApplicationBatch":
+        """Build a batch from column lists, enforcing the LoanApplication constraints vectorized."""
+        lengths = {len(applicant_income), len(credit_score), len(loan_amount), len(employment_status)}
+        if len(lengths) != 1:
+            raise BatchValidationError([{"loc": ["body"], "msg": "Columns must have equal length", "type": "value_error"}])
+
+        errors: List[Dict[str, Any]] = []
+        income = _numeric_column(applicant_income, "applicant_income", np.float64, errors)
+        amount = _numeric_column(loan_amount, "loan_amount", np.float64, errors)
+        raw_score = _numeric_column(credit_score, "credit_score", np.float64, errors)
+
+        # confloat(gt=0)
+        for field, column in (("applicant_income", income), ("loan_amount", amount)):
+            for row in np.flatnonzero(~(column > 0)):
+                errors.append(_error(int(row), field, "Input should be greater than 0", "greater_than"))
+
+        # conint(ge=300, le=850); fractional values are rejected like Pydantic's int parsing
+        for row in np.flatnonzero(raw_score != np.floor(raw_score)):
+            errors.append(_error(int(row), "credit_score", "Input should be a valid integer", "int_from_float"))
+        for row in np.flatnonzero(raw_score < 300):
+            errors.append(_error(int(row), "credit_score", "Input should be greater than or equal to 300", "greater_than_equal"))
+        for row in np.flatnonzero(raw_score > 850):
+            errors.append(_error(int(row), "credit_score", "Input should be less than or equal to 850", "less_than_equal"))
+
+        codes = np.fromiter(
+            (EMPLOYMENT_CODES.get(status, -1) if isinstance(status, str) else -1 for status in employment_status),
+            dtype=np.int8, count=len(employment_status)
+        )
+        for row in np.flatnonzero(codes < 0):
+            errors.append(_error(
+                int(row), "employment_status",
+                f"Input should be {', '.join(repr(s) for s in EMPLOYMENT_STATUSES)}", "enum"
+            ))
+
+        if errors:
+            raise BatchValidationError(sorted(errors, key=lambda e: (e["loc"][1], e["loc"][2])))
+
+        return cls(income, raw_score.astype(np.int16), amount, codes)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "LoanApplicationBatch":
+        """Build a batch from row-oriented dicts (the JSON array form)."""
+        records = list(records)
+        columns = {field: [] for field in FIELDS}
+        for row, record in enumerate(records):
+            if not isinstance(record, dict):
+                raise BatchValidationError([{"loc": ["body", row], "msg": "Input should be a valid dictionary", "type": "dict_type"}])
+            missing = [field for field in FIELDS if field not in record]
+            if missing:
+                raise BatchValidationError([_error(row, field, "Field required", "missing") for field in missing])
+            for field in FIELDS:
+                columns[field].append(record[field])
+        return cls.from_columns(**columns)
+
+    @classmethod
+    def from_payload(cls, payload: Any) -> "LoanApplicationBatch":
+        """Accept either a JSON array of applications or a columnar object of equal-length arrays."""
+        if isinstance(payload, dict):
+            missing = [field for field in FIELDS if not isinstance(payload.get(field), list)]
+            if missing:
+                raise BatchValidationError([{"loc": ["body", field], "msg": "Field required", "type": "missing"} for field in missing])
+            return cls.from_columns(**{field: payload[field] for field in FIELDS})
+        if isinstance(payload, list):
+            return cls.from_records(payload)
+        raise BatchValidationError([{"loc": ["body"], "msg": "Input should be a list or columnar object", "type": "list_type"}])
+
+    # --- Views ---
+    def __len__(self) -> int:
+        return len(self.credit_score)
+
+    def __getitem__(self, index: slice) -> "LoanApplicationBatch":
+        """Slices share memory with the parent batch (NumPy basic indexing)."""
+        return LoanApplicationBatch(
+            self.applicant_income[index], self.credit_score[index],
+            self.loan_amount[index], self.employment_code[index]
+        )
+
+    @property
+    def employment_status(self) -> np.ndarray:
+        return np.asarray(EMPLOYMENT_STATUSES, dtype=object)[self.employment_code]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+    # --- Scoring ---
+    def score(self, rng: Optional[np.random.Generator] = None):
+        """
+        Vectorized equivalent of `score_application`.
+        Returns (approved, confidence) arrays.
+        """
+        rng = rng or np.random.default_rng()
+        score = (
+            np.where(self.credit_score > 700, 0.5, 0.0)
+            + np.where(self.applicant_income > 30000, 0.3, 0.0)
+            + np.where(self.employment_code == _EMPLOYED, 0.2, 0.0)
+        )
+        confidence = np.minimum(score + rng.uniform(-0.1, 0.1, len(self)), 1.0) # nosec
+        return confidence > 0.6, confidence
+
+    def reasons(self, approved: np.ndarray) -> List[List[str]]:
+        """Rejection reasons per row, derived from column masks rather than per-row branching."""
+        denied = ~approved
+        masks = (
+            ("Credit score below 600", denied & (self.credit_score <= 600)),
+            ("Income too low for loan amount", denied & (self.applicant_income < 30000)),
+            ("Employment status required", denied & (self.employment_code != _EMPLOYED) & (self.employment_code != _SELF_EMPLOYED)),
+        )
+        reasons: List[List[str]] = [[] for _ in range(len(self))]
+        for reason, mask in masks:
+            for row in np.flatnonzero(mask):
+                reasons[row].append(reason)
+        return reasons
+
+    # --- Serialization ---
+    def to_columns(self) -> Dict[str, list]:
+        """Plain-Python columns, converted once per field rather than once per row."""
+        return {
+            "applicant_income": self.applicant_income.tolist(),
+            "credit_score": self.credit_score.tolist(),
+            "loan_amount": self.loan_amount.tolist(),
+            "employment_status": self.employment_status.tolist(),
+        }
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Row dicts with the same shape as `LoanApplication.model_dump()` (used for auditor payloads)."""
+        columns = self.to_columns()
+        return [
+            dict(zip(FIELDS, row))
+            for row in zip(columns["applicant_income"], columns["credit_score"],
+                           columns["loan_amount"], columns["employment_status"])
+        ]
@@ -10,6 +10,21 @@ SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
+# Sessions handed out by get_db. Counted here rather than read from the pool because
+# SQLite runs on NullPool, which has no size to saturate.
+DB_MAX_SESSIONS = int(os.getenv("DB_MAX_SESSIONS", "64"))
+open_sessions = 0
+
 async def get_db():
-    async with SessionLocal() as session:
-        yield session
+    global open_sessions
+    open_sessions += 1
+    try:
+        async with SessionLocal() as session:
+            yield session
+    finally:
+        open_sessions -= 1
+
+
+def session_saturation() -> float:
+    """Open request sessions / DB_MAX_SESSIONS, fed to admission control."""
+    return open_sessions / DB_MAX_SESSIONS if DB_MAX_SESSIONS > 0 else 0.0
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime
+from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean
 from .database import Base
 import uuid
 from datetime import datetime
@@ -13,3 +13,33 @@ class LoanRecord(Base):
     decision = Column(String)  # Approved / Denied
     audit_status = Column(String)  # CLEARED / FLAGGED / OFFLINE
     audit_comments = Column(String, nullable=True)
+    # Hash chain (see ledger.py)
+    seq = Column(Integer, unique=True, index=True, nullable=True)
+    prev_hash = Column(String(64), nullable=True)
+    row_hash = Column(String(64), nullable=True)
+
+
+class ShadowComparison(Base):
+    __tablename__ = "shadow_comparisons"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    loan_record_id = Column(String, index=True, nullable=True)  # LoanRecord.id of the champion decision
+    model_name = Column(String, index=True)
+    champion_approved = Column(Boolean)
+    challenger_approved = Column(Boolean)
+    champion_confidence = Column(Float)
+    challenger_confidence = Column(Float)
+    champion_latency_ms = Column(Float)
+    challenger_latency_ms = Column(Float)
+
+
+class LedgerCheckpoint(Base):
+    __tablename__ = "ledger_checkpoints"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    start_seq = Column(Integer, unique=True, index=True)
+    end_seq = Column(Integer, unique=True, index=True)
+    # sha256(previous checkpoint's merkle_root || Merkle root over row_hash for seq in [start_seq, end_seq])
+    merkle_root = Column(String(64))
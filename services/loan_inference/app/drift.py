@@ -0,0 +1,362 @@
+"""
+Constant-memory streaming drift monitor.
+
+`predict_loan` / `predict_loan_batch` feed every decision (and the auditor's
+verdict) into a ring of `DRIFT_WINDOWS` time windows of `DRIFT_WINDOW_SECONDS`.
+Each window holds one merging t-digest per numeric feature and a count-min
+sketch per categorical feature, so memory is fixed no matter how much traffic
+flows through. Windows are merged on demand and compared against a baseline
+(PSI and Kolmogorov-Smirnov) which is pinned via the API and persisted to
+`DRIFT_BASELINE_PATH`.
+"""
+import hashlib
+import math
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+from .models import EmploymentStatus
+
+NUMERIC_FEATURES = ("credit_score", "applicant_income", "loan_amount", "confidence_score")
+CATEGORIES = {
+    "employment_status": tuple(status.value for status in EmploymentStatus),
+    "audit_status": ("CLEARED", "FLAGGED", "OFFLINE", "UNKNOWN"),
+}
+PSI_WARNING = 0.1
+PSI_DRIFT = 0.2
+
+
+class TDigest:
+    """Merging t-digest (k1 scale). Holds at most ~`compression` centroids plus a bounded buffer."""
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[Tuple[float, float]] = []
+        self._buffer_limit = int(5 * compression)
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        other._compress()
+        self._buffer.extend(zip(other.means, other.weights))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self.means, self.weights)) + self._buffer)
+        self._buffer = []
+        total = sum(w for _, w in points)
+        means, weights = [points[0][0]], [points[0][1]]
+        seen = 0.0
+        k_lower = self._k(0.0)
+        for mean, weight in points[1:]:
+            q = (seen + weights[-1] + weight) / total
+            if self._k(min(q, 1.0)) - k_lower <= 1.0:
+                merged = weights[-1] + weight
+                means[-1] += (mean - means[-1]) * weight / merged
+                weights[-1] = merged
+            else:
+                seen += weights[-1]
+                k_lower = self._k(min(seen / total, 1.0))
+                means.append(mean)
+                weights.append(weight)
+        self.means, self.weights = means, weights
+
+    def cdf(self, x: float) -> float:
+        self._compress()
+        if not self.means or x < self.min:
+            return 0.0
+        if x >= self.max:
+            return 1.0
+        # Piecewise-linear interpolation between centroid midpoints
+        cumulative = 0.0
+        previous_mean, previous_cum = self.min, 0.0
+        for mean, weight in zip(self.means, self.weights):
+            centre = cumulative + weight / 2
+            if x < mean:
+                span = mean - previous_mean
+                fraction = (x - previous_mean) / span if span > 0 else 1.0
+                return (previous_cum + fraction * (centre - previous_cum)) / self.count
+            previous_mean, previous_cum = mean, centre
+            cumulative += weight
+        span = self.max - previous_mean
+        fraction = (x - previous_mean) / span if span > 0 else 1.0
+        return (previous_cum + fraction * (self.count - previous_cum)) / self.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self.means:
+            return None
+        target = q * self.count
+        cumulative = 0.0
+        previous_mean, previous_cum = self.min, 0.0
+        for mean, weight in zip(self.means, self.weights):
+            centre = cumulative + weight / 2
+            if target < centre:
+                span = centre - previous_cum
+                return previous_mean + (mean - previous_mean) * ((target - previous_cum) / span if span > 0 else 1.0)
+            previous_mean, previous_cum = mean, centre
+            cumulative += weight
+        span = self.count - previous_cum
+        return previous_mean + (self.max - previous_mean) * ((target - previous_cum) / span if span > 0 else 1.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        self._compress()
+        return {"compression": self.compression, "means": self.means, "weights": self.weights,
+                "count": self.count, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TDigest":
+        digest = cls(data["compression"])
+        digest.means, digest.weights = list(data["means"]), list(data["weights"])
+        digest.count, digest.min, digest.max = data["count"], data["min"], data["max"]
+        return digest
+
+
+class CountMinSketch:
+    """Fixed-size frequency sketch for categorical values."""
+
+    def __init__(self, width: int = 64, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = [[0] * width for _ in range(depth)]
+        self.total = 0
+
+    def _buckets(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        for row in range(self.depth):
+            yield int.from_bytes(digest[4 * row:4 * row + 4], "little") % self.width
+
+    def add(self, key: str, count: int = 1) -> None:
+        for row, bucket in enumerate(self._buckets(key)):
+            self.table[row][bucket] += count
+        self.total += count
+
+    def estimate(self, key: str) -> int:
+        return min(self.table[row][bucket] for row, bucket in enumerate(self._buckets(key)))
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        for row in range(self.depth):
+            mine, theirs = self.table[row], other.table[row]
+            for bucket in range(self.width):
+                mine[bucket] += theirs[bucket]
+        self.total += other.total
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"width": self.width, "depth": self.depth, "table": self.table, "total": self.total}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CountMinSketch":
+        sketch = cls(data["width"], data["depth"])
+        sketch.table, sketch.total = [list(row) for row in data["table"]], data["total"]
+        return sketch
+
+
+class DriftWindow:
+    def __init__(self, start: float = 0.0):
+        self.start = start
+        self.digests = {feature: TDigest() for feature in NUMERIC_FEATURES}
+        self.categories = {name: CountMinSketch() for name in CATEGORIES}
+
+    def merge(self, other: "DriftWindow") -> "DriftWindow":
+        for feature in NUMERIC_FEATURES:
+            self.digests[feature].merge(other.digests[feature])
+        for name in CATEGORIES:
+            self.categories[name].merge(other.categories[name])
+        return self
+
+    def distribution(self, name: str) -> Dict[str, float]:
+        sketch = self.categories[name]
+        if not sketch.total:
+            return {value: 0.0 for value in CATEGORIES[name]}
+        return {value: sketch.estimate(value) / sketch.total for value in CATEGORIES[name]}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "digests": {feature: digest.to_dict() for feature, digest in self.digests.items()},
+            "categories": {name: sketch.to_dict() for name, sketch in self.categories.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DriftWindow":
+        window = cls()
+        window.digests = {feature: TDigest.from_dict(d) for feature, d in data["digests"].items()}
+        window.categories = {name: CountMinSketch.from_dict(c) for name, c in data["categories"].items()}
+        return window
+
+
+# --- Drift Statistics ---
+def _psi(expected: List[float], actual: List[float], epsilon: float = 1e-4) -> float:
+    return sum(
+        (a - e) * math.log(a / e)
+        for e, a in ((max(e, epsilon), max(a, epsilon)) for e, a in zip(expected, actual))
+    )
+
+
+def numeric_psi(baseline: TDigest, current: TDigest, bins: int = 10) -> Optional[float]:
+    """PSI over the baseline's decile bins."""
+    if not baseline.count or not current.count:
+        return None
+    edges = sorted({baseline.quantile(i / bins) for i in range(1, bins)})
+    cdf_base = [0.0] + [baseline.cdf(edge) for edge in edges] + [1.0]
+    cdf_cur = [0.0] + [current.cdf(edge) for edge in edges] + [1.0]
+    expected = [cdf_base[i + 1] - cdf_base[i] for i in range(len(edges) + 1)]
+    actual = [cdf_cur[i + 1] - cdf_cur[i] for i in range(len(edges) + 1)]
+    return _psi(expected, actual)
+
+
+def ks_statistic(baseline: TDigest, current: TDigest) -> Optional[float]:
+    """Max CDF distance, evaluated at the centroids of both digests."""
+    if not baseline.count or not current.count:
+        return None
+    baseline._compress()
+    current._compress()
+    points = baseline.means + current.means
+    return max(abs(baseline.cdf(x) - current.cdf(x)) for x in points)
+
+
+def _status(psi: Optional[float]) -> Optional[str]:
+    if psi is None:
+        return None
+    return "drift" if psi >= PSI_DRIFT else "warning" if psi >= PSI_WARNING else "stable"
+
+
+class DriftMonitor:
+    def __init__(self, window_seconds: float = 300.0, windows: int = 12, baseline_path: Optional[str] = None):
+        self.window_seconds = window_seconds
+        self.windows: List[Optional[DriftWindow]] = [None] * windows
+        self.baseline: Optional[DriftWindow] = None
+        self.baseline_created_at: Optional[str] = None
+        self.baseline_path = baseline_path
+        if baseline_path and os.path.exists(baseline_path):
+            self._load_baseline()
+
+    @classmethod
+    def from_env(cls) -> "DriftMonitor":
+        return cls(
+            window_seconds=float(os.getenv("DRIFT_WINDOW_SECONDS", "300")),
+            windows=int(os.getenv("DRIFT_WINDOWS", "12")),
+            baseline_path=os.getenv("DRIFT_BASELINE_PATH") or None,
+        )
+
+    def _window(self, now: Optional[float] = None) -> DriftWindow:
+        now = time.time() if now is None else now
+        start = now - now % self.window_seconds
+        slot = int(start // self.window_seconds) % len(self.windows)
+        window = self.windows[slot]
+        if window is None or window.start != start:
+            # Ring slot is stale (older than the retention horizon): recycle it
+            window = self.windows[slot] = DriftWindow(start)
+        return window
+
+    # --- Feeding ---
+    def observe(self, credit_score: float, applicant_income: float, loan_amount: float,
+                confidence_score: float, employment_status: str, audit_status: str,
+                now: Optional[float] = None) -> None:
+        window = self._window(now)
+        window.digests["credit_score"].add(float(credit_score))
+        window.digests["applicant_income"].add(float(applicant_income))
+        window.digests["loan_amount"].add(float(loan_amount))
+        window.digests["confidence_score"].add(float(confidence_score))
+        window.categories["employment_status"].add(employment_status)
+        window.categories["audit_status"].add(audit_status)
+
+    def observe_batch(self, rows: List[Dict[str, Any]], confidence: List[float], audit_statuses: List[str]) -> None:
+        """`rows` are applicant dicts as produced by `LoanApplicationBatch.to_records`."""
+        now = time.time()
+        for row, row_confidence, audit_status in zip(rows, confidence, audit_statuses):
+            self.observe(row["credit_score"], row["applicant_income"], row["loan_amount"],
+                         row_confidence, row["employment_status"], audit_status, now=now)
+
+    # --- Reporting ---
+    def current(self, now: Optional[float] = None) -> DriftWindow:
+        now = time.time() if now is None else now
+        horizon = now - self.window_seconds * len(self.windows)
+        merged = DriftWindow(now)
+        for window in self.windows:
+            if window is not None and window.start > horizon:
+                merged.merge(window)
+        return merged
+
+    def pin_baseline(self) -> Dict[str, Any]:
+        self.baseline = self.current()
+        self.baseline_created_at = datetime.utcnow().isoformat()
+        if self.baseline_path:
+            with open(self.baseline_path, "wb") as f:
+                f.write(orjson.dumps({"created_at": self.baseline_created_at, "window": self.baseline.to_dict()}))
+        return {"created_at": self.baseline_created_at,
+                "observations": int(self.baseline.categories["audit_status"].total)}
+
+    def _load_baseline(self) -> None:
+        with open(self.baseline_path, "rb") as f:
+            data = orjson.loads(f.read())
+        self.baseline = DriftWindow.from_dict(data["window"])
+        self.baseline_created_at = data["created_at"]
+
+    def report(self) -> Dict[str, Any]:
+        current = self.current()
+        baseline = self.baseline
+        features = {}
+        for feature in NUMERIC_FEATURES:
+            digest = current.digests[feature]
+            psi = numeric_psi(baseline.digests[feature], digest) if baseline else None
+            features[feature] = {
+                "count": int(digest.count),
+                "p50": digest.quantile(0.5),
+                "p90": digest.quantile(0.9),
+                "p99": digest.quantile(0.99),
+                "psi": psi,
+                "ks": ks_statistic(baseline.digests[feature], digest) if baseline else None,
+                "status": _status(psi),
+            }
+
+        categories = {}
+        for name in CATEGORIES:
+            distribution = current.distribution(name)
+            psi = None
+            if baseline and baseline.categories[name].total and current.categories[name].total:
+                base_distribution = baseline.distribution(name)
+                psi = _psi([base_distribution[v] for v in CATEGORIES[name]], [distribution[v] for v in CATEGORIES[name]])
+            categories[name] = {"distribution": distribution, "psi": psi, "status": _status(psi)}
+
+        return {
+            "window_seconds": self.window_seconds,
+            "retained_windows": len(self.windows),
+            "observations": int(current.categories["audit_status"].total),
+            "flagged_rate": {
+                "current": categories["audit_status"]["distribution"]["FLAGGED"],
+                "baseline": baseline.distribution("audit_status")["FLAGGED"] if baseline else None,
+            },
+            "baseline": {
+                "created_at": self.baseline_created_at,
+                "observations": int(baseline.categories["audit_status"].total),
+            } if baseline else None,
+            "features": features,
+            "categories": categories,
+        }
+
+
+drift_monitor = DriftMonitor.from_env()
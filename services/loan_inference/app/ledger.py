@@ -0,0 +1,264 @@
+"""
+Tamper-evident hash chain over `loan_records`.
+
+Every appended record gets a gap-free `seq`, the `row_hash` of its predecessor
+(`prev_hash`) and its own `row_hash = sha256(prev_hash || canonical(record))`.
+Hashes are computed per commit batch under one lock, so a batch of N decisions
+costs one head lookup and one executemany.
+
+Every `LEDGER_CHECKPOINT_INTERVAL` records (fixed for the life of the ledger;
+startup refuses a changed value) a `LedgerCheckpoint` seals the block
+with a root chained to the previous checkpoint:
+`root_i = sha256(root_{i-1} || merkle(row_hashes of block i))`. Rewriting any
+block therefore changes every later checkpoint root, so the latest root
+(reported as `checkpoint_root`) is a single value that can be recorded outside
+the database and compared later. `verify_range` only reads the rows it is asked
+about (plus one predecessor hash and one predecessor checkpoint), recomputes the
+chain, and checks the checkpoints fully inside the range.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+from sqlalchemy import Connection, func, insert, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from .db_models import LedgerCheckpoint, LoanRecord
+
+GENESIS_HASH = "0" * 64
+CHECKPOINT_INTERVAL = int(os.getenv("LEDGER_CHECKPOINT_INTERVAL", "256"))
+HASHED_FIELDS = (
+    "id", "seq", "timestamp", "applicant_income", "credit_score", "decision", "audit_status", "audit_comments"
+)
+
+APPEND_ATTEMPTS = 5
+
+logger = logging.getLogger()
+
+# Serializes chain appends within this process; the unique seq index rejects forks across processes
+_chain_lock = asyncio.Lock()
+
+
+# --- Hashing Primitives (shared with ledger_cli) ---
+def canonical_payload(record: Dict[str, Any]) -> bytes:
+    values = dict((field, record.get(field)) for field in HASHED_FIELDS)
+    timestamp = values["timestamp"]
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    values["timestamp"] = timestamp.isoformat(timespec="microseconds")
+    values["applicant_income"] = float(values["applicant_income"])
+    return orjson.dumps(values)
+
+
+def chain_hash(prev_hash: str, record: Dict[str, Any]) -> str:
+    return hashlib.sha256(bytes.fromhex(prev_hash) + canonical_payload(record)).hexdigest()
+
+
+def merkle_root(hashes: Iterable[str]) -> str:
+    level = [bytes.fromhex(h) for h in hashes]
+    if not level:
+        return GENESIS_HASH
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+    return level[0].hex()
+
+
+def checkpoint_root(prev_root: str, hashes: Iterable[str]) -> str:
+    return hashlib.sha256(bytes.fromhex(prev_root) + bytes.fromhex(merkle_root(hashes))).hexdigest()
+
+
+async def _checkpoint_root_before(db: AsyncSession, start_seq: int) -> Optional[str]:
+    """Root of the checkpoint ending at `start_seq - 1` (GENESIS_HASH for the first block)."""
+    if start_seq == 1:
+        return GENESIS_HASH
+    return (await db.execute(
+        select(LedgerCheckpoint.merkle_root).where(LedgerCheckpoint.end_seq == start_seq - 1)
+    )).scalar()
+
+
+# --- Schema ---
+CHAIN_COLUMNS = {"seq": "INTEGER", "prev_hash": "VARCHAR(64)", "row_hash": "VARCHAR(64)"}
+
+
+def migrate_ledger_schema(conn: Connection) -> List[str]:
+    """
+    Idempotently add the hash-chain columns (and the unique seq index) to a
+    `loan_records` table created before the ledger existed; `create_all` only
+    creates missing tables. Run via `conn.run_sync` after `create_all`.
+    Pre-existing rows keep seq NULL and stay outside the chain.
+    """
+    existing = {column["name"] for column in inspect(conn).get_columns(LoanRecord.__tablename__)}
+    added = [name for name in CHAIN_COLUMNS if name not in existing]
+    for name in added:
+        conn.execute(text(f"ALTER TABLE loan_records ADD COLUMN {name} {CHAIN_COLUMNS[name]}"))  # nosec
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_loan_records_seq ON loan_records (seq)"))
+    return added
+
+
+def check_checkpoint_interval(conn: Connection) -> None:
+    """Refuse to start if LEDGER_CHECKPOINT_INTERVAL differs from the interval the ledger was sealed with."""
+    latest = conn.execute(
+        select(LedgerCheckpoint.start_seq, LedgerCheckpoint.end_seq).order_by(LedgerCheckpoint.end_seq.desc()).limit(1)
+    ).first()
+    if latest is not None and latest[1] - latest[0] + 1 != CHECKPOINT_INTERVAL:
+        raise RuntimeError(
+            f"LEDGER_CHECKPOINT_INTERVAL is {CHECKPOINT_INTERVAL} but the ledger is sealed every "
+            f"{latest[1] - latest[0] + 1} records; block boundaries cannot change"
+        )
+
+
+def _record_dict(record: LoanRecord) -> Dict[str, Any]:
+    return {field: getattr(record, field) for field in HASHED_FIELDS}
+
+
+# --- Append ---
+async def _chain_head(db: AsyncSession):
+    head = (await db.execute(
+        select(LoanRecord.seq, LoanRecord.row_hash)
+        .where(LoanRecord.seq.is_not(None))
+        .order_by(LoanRecord.seq.desc())
+        .limit(1)
+    )).first()
+    return (head[0], head[1]) if head else (0, GENESIS_HASH)
+
+
+async def append_records(db: AsyncSession, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Chain and insert `rows` (LoanRecord column dicts) in one transaction.
+    Returns the rows with id, seq and hashes filled in.
+
+    Another worker process can read the same head; its insert then trips the
+    unique seq (or checkpoint) index, so the transaction is rolled back and the
+    rows are re-chained from a fresh head, up to APPEND_ATTEMPTS times.
+    """
+    async with _chain_lock:
+        for attempt in range(1, APPEND_ATTEMPTS + 1):
+            try:
+                await _append_once(db, rows)
+                return rows
+            except IntegrityError:
+                await db.rollback()
+                if attempt == APPEND_ATTEMPTS:
+                    raise
+    return rows
+
+
+async def _append_once(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    seq, prev_hash = await _chain_head(db)
+    first_seq = seq + 1
+
+    now = datetime.utcnow()
+    for row in rows:
+        seq += 1
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("timestamp", now)
+        row["seq"] = seq
+        row["prev_hash"] = prev_hash
+        row["row_hash"] = prev_hash = chain_hash(prev_hash, row)
+
+    if rows:
+        await db.execute(insert(LoanRecord), rows)
+        await _write_checkpoints(db, first_seq, rows)
+    await db.commit()
+
+
+async def _write_checkpoints(db: AsyncSession, first_seq: int, rows: List[Dict[str, Any]]) -> None:
+    last_seq = rows[-1]["seq"]
+    first_end = -(-first_seq // CHECKPOINT_INTERVAL) * CHECKPOINT_INTERVAL
+    checkpoints = []
+    prev_root = None
+    for end in range(first_end, last_seq + 1, CHECKPOINT_INTERVAL):
+        start = end - CHECKPOINT_INTERVAL + 1
+        if prev_root is None:
+            prev_root = await _checkpoint_root_before(db, start)
+            if prev_root is None:
+                # Sealing against GENESIS_HASH would make verify_range report tampering later
+                logger.error("Ledger checkpoint skipped: no checkpoint ends at seq %d", start - 1)
+                return
+        hashes: List[str] = []
+        if start < first_seq:
+            hashes.extend((await db.execute(
+                select(LoanRecord.row_hash)
+                .where(LoanRecord.seq.between(start, first_seq - 1))
+                .order_by(LoanRecord.seq)
+            )).scalars().all())
+        hashes.extend(row["row_hash"] for row in rows[max(start - first_seq, 0):end - first_seq + 1])
+        prev_root = checkpoint_root(prev_root, hashes)
+        checkpoints.append({"start_seq": start, "end_seq": end, "merkle_root": prev_root})
+    if checkpoints:
+        await db.execute(insert(LedgerCheckpoint), checkpoints)
+
+
+# --- Verify ---
+async def verify_range(db: AsyncSession, start: int, end: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Verify records with seq in [start, end]. `end` defaults to, and is clamped at,
+    the chain head: asking past the head is not evidence of tampering.
+    """
+    head = (await db.execute(select(func.max(LoanRecord.seq)))).scalar() or 0
+    end = head if end is None else min(end, head)
+
+    report: Dict[str, Any] = {
+        "from": start, "to": end, "head": head, "verified_records": 0, "verified_checkpoints": 0,
+        "checkpoint_root": None, "valid": True, "first_invalid_seq": None, "error": None,
+    }
+
+    def fail(seq: int, error: str) -> Dict[str, Any]:
+        report.update(valid=False, first_invalid_seq=seq, error=error)
+        return report
+
+    if start > end:
+        return report
+
+    if start == 1:
+        prev_hash = GENESIS_HASH
+    else:
+        prev_hash = (await db.execute(select(LoanRecord.row_hash).where(LoanRecord.seq == start - 1))).scalar()
+        if prev_hash is None:
+            return fail(start - 1, "Missing predecessor record")
+
+    hashes: Dict[int, str] = {}
+    expected_seq = start
+    result = await db.stream(
+        select(LoanRecord).where(LoanRecord.seq.between(start, end)).order_by(LoanRecord.seq)
+    )
+    async for record in result.scalars():
+        if record.seq != expected_seq:
+            return fail(expected_seq, "Missing record (gap in sequence)")
+        if record.prev_hash != prev_hash:
+            return fail(record.seq, "Broken link: prev_hash does not match predecessor")
+        if chain_hash(prev_hash, _record_dict(record)) != record.row_hash:
+            return fail(record.seq, "Record content does not match row_hash")
+        prev_hash = hashes[record.seq] = record.row_hash
+        expected_seq += 1
+        report["verified_records"] += 1
+
+    if expected_seq != end + 1:
+        return fail(expected_seq, "Missing record (gap in sequence)")
+
+    checkpoints = (await db.execute(
+        select(LedgerCheckpoint)
+        .where(LedgerCheckpoint.start_seq >= start, LedgerCheckpoint.end_seq <= end)
+        .order_by(LedgerCheckpoint.start_seq)
+    )).scalars().all()
+    prev_root = await _checkpoint_root_before(db, checkpoints[0].start_seq) if checkpoints else None
+    for checkpoint in checkpoints:
+        if prev_root is None:
+            return fail(checkpoint.start_seq, f"Checkpoint {checkpoint.start_seq}-{checkpoint.end_seq} has no predecessor checkpoint")
+        block = [hashes[seq] for seq in range(checkpoint.start_seq, checkpoint.end_seq + 1)]
+        prev_root = checkpoint_root(prev_root, block)
+        if prev_root != checkpoint.merkle_root:
+            return fail(checkpoint.start_seq, f"Checkpoint {checkpoint.start_seq}-{checkpoint.end_seq} Merkle root mismatch")
+        report["verified_checkpoints"] += 1
+        report["checkpoint_root"] = prev_root
+
+    return report
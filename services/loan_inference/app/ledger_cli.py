@@ -0,0 +1,102 @@
+"""
+Streaming integrity verifier for a FinCore ledger database.
+
+Walks `loan_records` in `seq` order with a server-side cursor, recomputing the
+hash chain and every chained Merkle checkpoint. Memory use is bounded by one checkpoint
+block regardless of ledger size.
+
+    python -m services.loan_inference.app.ledger_cli ./bank.db
+    python -m app.ledger_cli /app/data/bank.db        # inside the container
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .ledger import GENESIS_HASH, HASHED_FIELDS, chain_hash, checkpoint_root
+
+FETCH_SIZE = 5000
+
+
+def _stream_records(conn: sqlite3.Connection) -> Iterator[Dict]:
+    columns = ", ".join(HASHED_FIELDS + ("prev_hash", "row_hash"))
+    cursor = conn.execute(f"SELECT {columns} FROM loan_records WHERE seq IS NOT NULL ORDER BY seq")  # nosec
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            return
+        for row in rows:
+            yield dict(zip(HASHED_FIELDS + ("prev_hash", "row_hash"), row))
+
+
+def _checkpoints(conn: sqlite3.Connection) -> Dict[int, Tuple[int, str]]:
+    """end_seq -> (start_seq, merkle_root). One small row per checkpoint block."""
+    return {
+        end: (start, root)
+        for start, end, root in conn.execute("SELECT start_seq, end_seq, merkle_root FROM ledger_checkpoints")
+    }
+
+
+def verify_database(path: str, progress_every: int = 100000) -> Tuple[bool, Optional[str], int, int, str]:
+    """Returns (valid, error, verified_records, verified_checkpoints, latest_checkpoint_root)."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        checkpoints = _checkpoints(conn)
+        starts = {start for start, _ in checkpoints.values()}
+        prev_hash = prev_root = GENESIS_HASH
+        expected_seq = 1
+        block: List[str] = []
+        verified_checkpoints = 0
+
+        for record in _stream_records(conn):
+            seq = record["seq"]
+            if seq != expected_seq:
+                return False, f"seq {expected_seq}: missing record (gap in sequence)", expected_seq - 1, verified_checkpoints, prev_root
+            if record["prev_hash"] != prev_hash:
+                return False, f"seq {seq}: broken link, prev_hash does not match predecessor", seq - 1, verified_checkpoints, prev_root
+            if chain_hash(prev_hash, record) != record["row_hash"]:
+                return False, f"seq {seq}: record content does not match row_hash", seq - 1, verified_checkpoints, prev_root
+            prev_hash = record["row_hash"]
+
+            if seq in starts:
+                block = []
+            block.append(prev_hash)
+            if seq in checkpoints:
+                start, root = checkpoints.pop(seq)
+                if len(block) != seq - start + 1 or checkpoint_root(prev_root, block) != root:
+                    return False, f"checkpoint {start}-{seq}: Merkle root mismatch", seq, verified_checkpoints, prev_root
+                prev_root = root
+                verified_checkpoints += 1
+                block = []
+
+            expected_seq += 1
+            if progress_every and seq % progress_every == 0:
+                print(f"... {seq} records verified", file=sys.stderr)
+
+        if checkpoints:
+            missing = min(start for start, _ in checkpoints.values())
+            return False, f"checkpoint starting at seq {missing} covers records that do not exist", expected_seq - 1, verified_checkpoints, prev_root
+        return True, None, expected_seq - 1, verified_checkpoints, prev_root
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Verify the FinCore loan ledger hash chain and Merkle checkpoints.")
+    parser.add_argument("database", help="Path to the SQLite ledger (e.g. ./bank.db)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    valid, error, records, checkpoints, root = verify_database(args.database)
+    elapsed = time.perf_counter() - started
+    if valid:
+        print(f"OK: {records} records and {checkpoints} checkpoints verified in {elapsed:.2f}s")
+        print(f"Latest checkpoint root: {root}")
+        return 0
+    print(f"TAMPERED: {error} ({records} records verified before failure)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
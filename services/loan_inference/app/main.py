@@ -2,11 +2,16 @@ import logging
 import uuid
 import sys
 from fastapi import FastAPI, Request, Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pythonjsonlogger import jsonlogger
 from starlette.middleware.base import BaseHTTPMiddleware
 from .api import router as api_router
-from .database import engine, Base
+from .database import engine, Base, session_saturation
+from .auditor_client import auditor_pool
+from .profiling import install_profiling
+from .admission import install_admission_control
+from .shadow import shadow_scorer
+from .ledger import check_checkpoint_interval, migrate_ledger_schema
 from . import db_models
 
 # --- Setup Structured Logging ---
@@ -37,16 +42,31 @@ class CorrelationIdMiddleware(BaseHTTPMiddleware):
 app = FastAPI(
     title="FinCore Inference Engine",
     description="A template for deploying AI models with bank-grade security and structure.",
-    version="1.1.0"
+    version="1.1.0",
+    default_response_class=ORJSONResponse
 )
 
+# Profiling (no-op unless PROFILING_ENABLED) sits inside the correlation middleware
+install_profiling(app)
 app.add_middleware(CorrelationIdMiddleware)
+# Admission control is outermost so shed requests cost as little as possible
+install_admission_control(app, db_pool_saturation=session_saturation)
 
 # --- Database Initialization ---
 @app.on_event("startup")
 async def startup_event():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        added = await conn.run_sync(migrate_ledger_schema)
+        await conn.run_sync(check_checkpoint_interval)
+    if added:
+        logger.info("Migrated loan_records for the ledger hash chain", extra={"added_columns": added})
+    shadow_scorer.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await shadow_scorer.stop()
+    await auditor_pool.aclose()
 
 # --- Exception Handlers ---
 @app.exception_handler(Exception)
@@ -1,6 +1,7 @@
 from enum import Enum
+from datetime import datetime
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, conint, confloat
+from pydantic import BaseModel, ConfigDict, Field, conint, confloat
 
 class EmploymentStatus(str, Enum):
     employed = "employed"
@@ -20,3 +21,37 @@ class PredictionResponse(BaseModel):
     confidence_score: float = Field(..., description="Confidence score of the model (0-1)")
     reasons: List[str] = Field(default=[], description="List of reasons for the decision, especially if rejected")
     audit_analysis: Optional[Dict[str, Any]] = Field(default=None, description="Audit results from the Compliance Auditor Agent")
+    stage_timings_ms: Dict[str, float] = Field(default={}, description="Server-side duration of each decision stage in milliseconds")
+
+class BatchPredictionResponse(BaseModel):
+    results: List[PredictionResponse] = Field(..., description="Per-application decisions, in request order")
+    stage_timings_ms: Dict[str, float] = Field(default={}, description="Server-side duration of each batch stage in milliseconds")
+
+
+class ApprovalRatePoint(BaseModel):
+    bucket: str = Field(..., description="Hourly bucket (UTC) in YYYY-MM-DDTHH:00 format")
+    records: int = Field(..., description="Number of decisions in the bucket")
+    approval_rate: float = Field(..., description="Share of approved decisions in the bucket (0-1)")
+
+class HistorySummary(BaseModel):
+    cursor: Optional[datetime] = Field(default=None, description="Timestamp of the latest ledger record")
+    total_records: int = Field(..., description="Total number of decisions in the ledger")
+    approval_rate: float = Field(..., description="Share of approved decisions (0-1)")
+    flagged_ratio: float = Field(..., description="Share of decisions flagged by the Compliance Auditor (0-1)")
+    approval_rate_series: List[ApprovalRatePoint] = Field(default=[], description="Approval rate per hourly bucket, oldest first")
+
+
+class ShadowModelReport(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    model_name: str = Field(..., description="Challenger model name")
+    comparisons: int = Field(..., description="Number of shadow decisions recorded")
+    agreement_rate: float = Field(..., description="Share of decisions matching the champion (0-1)")
+    mean_confidence_delta: float = Field(..., description="Mean absolute difference from the champion confidence")
+    mean_challenger_latency_ms: float = Field(..., description="Mean challenger scoring time in milliseconds")
+    max_challenger_latency_ms: float = Field(..., description="Worst challenger scoring time in milliseconds")
+    mean_champion_latency_ms: float = Field(..., description="Mean champion scoring time in milliseconds")
+
+class ShadowReport(BaseModel):
+    scorer: Dict[str, Any] = Field(..., description="Live shadow queue counters (submitted, dropped, completed, ...)")
+    models: List[ShadowModelReport] = Field(default=[], description="Agreement and latency per challenger model")
@@ -0,0 +1,283 @@
+"""
+Opt-in sampling profiler.
+
+Disabled unless `PROFILING_ENABLED=true`; when disabled nothing is installed, so
+there is no middleware, no sampler thread and the admin routes do not exist.
+
+When enabled:
+* Per-request: a request carrying `X-Profile-Token: <PROFILING_TOKEN>`, or picked
+  by `PROFILING_SAMPLE_RATE`, is sampled for its whole lifetime (including a
+  streamed body). A speedscope JSON file is written to `PROFILING_OUTPUT_DIR`;
+  its path is returned in the `X-Profile-Artifact` header to token-authorised
+  requests only (sampled requests just get the file). Only the event loop
+  thread is sampled, so concurrent requests on the loop show up as well.
+* Whole process: `POST /admin/profile/start?seconds=N` samples every thread
+  until `POST /admin/profile/stop` or the time box expires, and returns the
+  aggregated hot stacks. Admin routes require the same token.
+
+A single daemon thread samples `sys._current_frames()`, and only while at least
+one capture is active. Keep this module identical across services.
+"""
+import asyncio
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+from fastapi import APIRouter, FastAPI, Header, HTTPException, Query, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+logger = logging.getLogger()
+
+Frame = Tuple[str, str, int]  # (function, file, line)
+
+
+class Capture:
+    """Stack samples for one thread (or all threads when thread_id is None)."""
+
+    def __init__(self, name: str, thread_id: Optional[int] = None):
+        self.name = name
+        self.thread_id = thread_id
+        self.stacks: Counter = Counter()
+        self.started = time.perf_counter()
+        self.duration = 0.0
+
+    def finish(self) -> "Capture":
+        self.duration = time.perf_counter() - self.started
+        return self
+
+    # --- Exporters ---
+    def hot_stacks(self, top: int = 25) -> Dict:
+        total = sum(self.stacks.values())
+        self_time: Counter = Counter()
+        for stack, count in self.stacks.items():
+            self_time[stack[-1]] += count
+        return {
+            "name": self.name,
+            "duration_s": round(self.duration, 3),
+            "samples": total,
+            "hot_stacks": [
+                {"samples": count, "ratio": round(count / total, 4), "stack": [_format(f) for f in stack]}
+                for stack, count in self.stacks.most_common(top)
+            ],
+            "hot_functions": [
+                {"samples": count, "ratio": round(count / total, 4), "frame": _format(frame)}
+                for frame, count in self_time.most_common(top)
+            ],
+        }
+
+    def speedscope(self, interval: float) -> bytes:
+        frame_index: Dict[Frame, int] = {}
+        samples: List[List[int]] = []
+        weights: List[float] = []
+        for stack, count in self.stacks.items():
+            samples.append([frame_index.setdefault(frame, len(frame_index)) for frame in stack])
+            weights.append(count * interval)
+        return orjson.dumps({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "exporter": "fincore-profiler",
+            "shared": {"frames": [{"name": f[0], "file": f[1], "line": f[2]} for f in frame_index]},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        })
+
+
+def _format(frame: Frame) -> str:
+    return f"{frame[0]} ({os.path.basename(frame[1])}:{frame[2]})"
+
+
+class Sampler:
+    """One background thread feeding every active capture."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._captures: List[Capture] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, capture: Capture) -> Capture:
+        with self._lock:
+            self._captures.append(capture)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="fincore-profiler", daemon=True)
+                self._thread.start()
+            self._wake.set()
+        return capture
+
+    def stop(self, capture: Capture) -> Capture:
+        with self._lock:
+            if capture in self._captures:
+                self._captures.remove(capture)
+        return capture.finish()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                captures = list(self._captures)
+                if not captures:
+                    self._wake.clear()
+            if not captures:
+                # Idle: park until a new capture arrives, exit if none does
+                if not self._wake.wait(timeout=5.0):
+                    with self._lock:
+                        if not self._captures:
+                            self._thread = None
+                            return
+                continue
+
+            frames = sys._current_frames()
+            stacks = {tid: _walk(frame) for tid, frame in frames.items() if tid != own_id}
+            for capture in captures:
+                if capture.thread_id is None:
+                    for stack in stacks.values():
+                        capture.stacks[stack] += 1
+                elif capture.thread_id in stacks:
+                    capture.stacks[stacks[capture.thread_id]] += 1
+            time.sleep(self.interval)
+
+
+def _token_matches(presented: Optional[str], token: Optional[str]) -> bool:
+    return bool(token) and presented is not None and hmac.compare_digest(presented.encode(), token.encode())
+
+
+def _walk(frame) -> Tuple[Frame, ...]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, frame.f_lineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, sampler: Sampler, token: Optional[str], sample_rate: float, output_dir: str):
+        super().__init__(app)
+        self.sampler = sampler
+        self.token = token
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+
+    def _sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate # nosec
+
+    async def dispatch(self, request: Request, call_next):
+        authorized = _token_matches(request.headers.get("X-Profile-Token"), self.token)
+        if not authorized and not self._sampled():
+            return await call_next(request)
+
+        request_id = getattr(request.state, "correlation_id", None) or str(uuid.uuid4())
+        name = f"{request.method} {request.url.path} {request_id}"
+        capture = self.sampler.start(Capture(name, threading.get_ident()))
+        try:
+            response = await call_next(request)
+        except Exception:
+            self.sampler.stop(capture)
+            raise
+
+        # Client-supplied correlation ids never become file names
+        artifact = os.path.join(self.output_dir, f"{uuid.uuid4()}.speedscope.json")
+        body_iterator = response.body_iterator
+
+        async def profiled_body():
+            # Keep sampling until the (possibly streamed) body is fully sent
+            try:
+                async for chunk in body_iterator:
+                    yield chunk
+            finally:
+                self.sampler.stop(capture)
+                await asyncio.to_thread(self._write, artifact, capture)
+
+        response.body_iterator = profiled_body()
+        if authorized:
+            # Server paths are only disclosed to callers holding the profiling token
+            response.headers["X-Profile-Artifact"] = artifact
+        return response
+
+    def _write(self, path: str, capture: Capture) -> None:
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(capture.speedscope(self.sampler.interval))
+            logger.info("Request profile captured", extra={"artifact": path, "samples": sum(capture.stacks.values())})
+        except OSError as e:
+            logger.error(f"Failed to write profile artifact: {str(e)}")
+
+
+def build_admin_router(sampler: Sampler, token: Optional[str], max_seconds: float) -> APIRouter:
+    router = APIRouter(prefix="/admin/profile", tags=["Admin"])
+    state: Dict[str, object] = {"capture": None, "timer": None, "last": None}
+
+    def authorize(x_profile_token: Optional[str]) -> None:
+        if not _token_matches(x_profile_token, token):
+            raise HTTPException(status_code=403, detail="Profiling token required")
+
+    def finish(top: int = 25) -> Dict:
+        capture = state["capture"]
+        if state["timer"] is not None:
+            state["timer"].cancel()
+        state["capture"], state["timer"] = None, None
+        state["last"] = sampler.stop(capture).hot_stacks(top)
+        return state["last"]
+
+    @router.post("/start", summary="Start a time-boxed whole-process profile")
+    async def start_profile(
+        seconds: float = Query(default=30.0, gt=0),
+        x_profile_token: Optional[str] = Header(default=None)
+    ):
+        authorize(x_profile_token)
+        if state["capture"] is not None:
+            raise HTTPException(status_code=409, detail="A process profile is already running")
+        seconds = min(seconds, max_seconds)
+        state["capture"] = sampler.start(Capture(f"process profile {uuid.uuid4()}"))
+        state["timer"] = asyncio.get_running_loop().call_later(seconds, finish)
+        return {"status": "running", "seconds": seconds, "interval_ms": sampler.interval * 1000}
+
+    @router.post("/stop", summary="Stop the process profile and return the hot stacks")
+    async def stop_profile(
+        top: int = Query(default=25, ge=1, le=500),
+        x_profile_token: Optional[str] = Header(default=None)
+    ):
+        authorize(x_profile_token)
+        if state["capture"] is not None:
+            return finish(top)
+        if state["last"] is not None:
+            return state["last"]
+        raise HTTPException(status_code=404, detail="No process profile has been started")
+
+    return router
+
+
+def install_profiling(app: FastAPI) -> None:
+    """Wire the profiler into `app` if PROFILING_ENABLED=true; otherwise do nothing."""
+    if os.getenv("PROFILING_ENABLED", "false").lower() != "true":
+        return
+
+    token = os.getenv("PROFILING_TOKEN") or None
+    sampler = Sampler(interval=float(os.getenv("PROFILING_INTERVAL_MS", "5")) / 1000)
+    app.add_middleware(
+        ProfilingMiddleware,
+        sampler=sampler,
+        token=token,
+        sample_rate=float(os.getenv("PROFILING_SAMPLE_RATE", "0")),
+        output_dir=os.getenv("PROFILING_OUTPUT_DIR", "./profiles"),
+    )
+    app.include_router(build_admin_router(sampler, token, float(os.getenv("PROFILING_MAX_SECONDS", "300"))))
+    logger.info("Profiling enabled", extra={"interval_ms": sampler.interval * 1000})
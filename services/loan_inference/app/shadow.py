@@ -0,0 +1,219 @@
+"""
+Shadow (champion/challenger) scoring.
+
+Challenger models listed in `SHADOW_MODELS` are evaluated off the request path:
+`predict_loan` enqueues the applicant features after it has committed its own
+decision, and background workers run the challengers in a `ProcessPoolExecutor`
+so they never compete with the event loop. Results land in `shadow_comparisons`.
+
+The queue is bounded (`SHADOW_QUEUE_SIZE`); when it is full new shadow work is
+dropped and counted, so applicant-facing latency is unaffected under load.
+Comparison rows are buffered and written in one executemany per
+`SHADOW_FLUSH_SECONDS` (or once `SHADOW_FLUSH_SIZE` rows are waiting), so shadow
+writes take SQLite's single writer lock rarely instead of once per decision and
+do not queue `append_records` behind them.
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from .database import SessionLocal
+from .db_models import ShadowComparison
+
+logger = logging.getLogger()
+
+
+# --- Challenger Models (module-level so they pickle into worker processes) ---
+def affordability_v2(features: Dict[str, Any]):
+    """Debt-to-income driven model: penalises large loans relative to income."""
+    loan_to_income = features["loan_amount"] / features["applicant_income"]
+    score = 0.35 * min(max((features["credit_score"] - 300) / 550, 0.0), 1.0)
+    score += 0.45 * max(0.0, 1.0 - loan_to_income / 0.6)
+    if features["employment_status"] in ("employed", "self_employed", "retired"):
+        score += 0.2
+    confidence = min(score, 1.0)
+    return confidence > 0.6, confidence
+
+
+def scorecard_v3(features: Dict[str, Any]):
+    """Logistic points scorecard over credit score, income and employment."""
+    logit = (
+        -6.0
+        + 0.009 * features["credit_score"]
+        + 0.6 * math.log10(max(features["applicant_income"], 1.0) / 10000)
+        - 1.2 * (features["loan_amount"] / features["applicant_income"])
+        + (0.5 if features["employment_status"] == "employed" else 0.0)
+    )
+    confidence = 1.0 / (1.0 + math.exp(-logit))
+    return confidence > 0.5, confidence
+
+
+CHALLENGERS = {
+    "affordability_v2": affordability_v2,
+    "scorecard_v3": scorecard_v3,
+}
+
+
+def run_challengers(model_names: List[str], features: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Executed inside a worker process."""
+    results = []
+    for name in model_names:
+        started = time.perf_counter()
+        approved, confidence = CHALLENGERS[name](features)
+        results.append({
+            "model_name": name,
+            "approved": bool(approved),
+            "confidence": float(confidence),
+            "latency_ms": (time.perf_counter() - started) * 1000,
+        })
+    return results
+
+
+class ShadowScorer:
+    def __init__(self, models: List[str], queue_size: int = 1000, workers: int = 2, processes: int = 2,
+                 flush_seconds: float = 1.0, flush_size: int = 500):
+        unknown = [name for name in models if name not in CHALLENGERS]
+        if unknown:
+            raise ValueError(f"Unknown shadow models: {', '.join(unknown)}")
+        self.models = models
+        self.queue_size = queue_size
+        self.workers = workers
+        self.processes = processes
+        self.flush_seconds = flush_seconds
+        self.flush_size = flush_size
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+        self.failed = 0
+        self.persisted = 0
+        self.flushes = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_now: Optional[asyncio.Event] = None
+
+    @classmethod
+    def from_env(cls) -> "ShadowScorer":
+        return cls(
+            [name.strip() for name in os.getenv("SHADOW_MODELS", "").split(",") if name.strip()],
+            queue_size=int(os.getenv("SHADOW_QUEUE_SIZE", "1000")),
+            workers=int(os.getenv("SHADOW_WORKERS", "2")),
+            processes=int(os.getenv("SHADOW_PROCESSES", "2")),
+            flush_seconds=float(os.getenv("SHADOW_FLUSH_SECONDS", "1.0")),
+            flush_size=int(os.getenv("SHADOW_FLUSH_SIZE", "500")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self._queue is not None
+
+    # --- Lifecycle ---
+    def start(self) -> None:
+        if not self.models or self.enabled:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._executor = ProcessPoolExecutor(max_workers=self.processes)
+        self._flush_now = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._flusher()))
+        logger.info("Shadow scoring enabled", extra={"models": self.models})
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._queue, self._executor, self._tasks, self._flush_now = None, None, [], None
+
+    # --- Request Path ---
+    def submit(self, loan_record_id: Optional[str], features: Dict[str, Any],
+               champion_approved: bool, champion_confidence: float, champion_latency_ms: float) -> None:
+        """Never blocks: drops the job if the shadow queue is full."""
+        if not self.enabled:
+            return
+        try:
+            self._queue.put_nowait((loan_record_id, features, champion_approved, champion_confidence, champion_latency_ms))
+            self.submitted += 1
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    # --- Background ---
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            loan_record_id, features, champion_approved, champion_confidence, champion_latency_ms = job
+            try:
+                results = await loop.run_in_executor(self._executor, run_challengers, self.models, features)
+                self._pending.extend(
+                    {
+                        "loan_record_id": loan_record_id,
+                        "model_name": result["model_name"],
+                        "champion_approved": champion_approved,
+                        "challenger_approved": result["approved"],
+                        "champion_confidence": champion_confidence,
+                        "challenger_confidence": result["confidence"],
+                        "champion_latency_ms": champion_latency_ms,
+                        "challenger_latency_ms": result["latency_ms"],
+                    }
+                    for result in results
+                )
+                self.completed += 1
+                if len(self._pending) >= self.flush_size:
+                    self._flush_now.set()
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Shadow scoring failed: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _flusher(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write all buffered comparison rows in one transaction. Rows of a failed write are dropped."""
+        rows, self._pending = self._pending, []
+        if not rows:
+            return
+        try:
+            async with SessionLocal() as session:
+                await session.execute(insert(ShadowComparison), rows)
+                await session.commit()
+            self.persisted += len(rows)
+            self.flushes += 1
+        except Exception as e:
+            self.failed += len(rows)
+            logger.error(f"Shadow comparison flush failed, {len(rows)} rows dropped: {str(e)}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "models": self.models,
+            "queue_depth": self._queue.qsize() if self.enabled else 0,
+            "queue_size": self.queue_size,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "completed": self.completed,
+            "failed": self.failed,
+            "buffered": len(self._pending),
+            "persisted": self.persisted,
+            "flushes": self.flushes,
+        }
+
+
+shadow_scorer = ShadowScorer.from_env()
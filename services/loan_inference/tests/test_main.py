@@ -83,3 +83,728 @@ def test_invalid_input():
     }
     response = client.post("/api/v1/predict", json=payload)
     assert response.status_code == 422
+
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+def test_predict_reports_stage_timings(mock_post):
+    from unittest.mock import MagicMock
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"status": "CLEARED", "comments": [], "mode": "RULE_BASED"}
+    mock_post.return_value = mock_response
+
+    payload = {
+        "applicant_income": 50000,
+        "credit_score": 750,
+        "loan_amount": 10000,
+        "employment_status": "employed"
+    }
+    response = client.post("/api/v1/predict", json=payload)
+    assert response.status_code == 200
+    timings = response.json()["stage_timings_ms"]
+    assert set(timings) == {"inference", "compliance_audit", "ledger_commit"}
+
+def fake_audit_stream(status="CLEARED"):
+    """Patch target for httpx.AsyncClient.stream that answers like /audit/batch (NDJSON, out of order)."""
+    import json
+    from contextlib import asynccontextmanager
+    from unittest.mock import MagicMock
+    calls = []
+
+    @asynccontextmanager
+    async def stream(self, method, url, content=None, **kwargs):
+        items = json.loads(content)
+        calls.append(items)
+
+        async def aiter_lines():
+            for index in reversed(range(len(items))):
+                yield json.dumps({"index": index, "status": status, "comments": [], "mode": "RULE_BASED"})
+
+        response = MagicMock()
+        response.status_code = 200
+        response.aiter_lines = aiter_lines
+        yield response
+
+    stream.calls = calls
+    return stream
+
+def test_predict_batch():
+    stream = fake_audit_stream()
+    payload = [
+        {"applicant_income": 50000, "credit_score": 750, "loan_amount": 10000, "employment_status": "employed"},
+        {"applicant_income": 10000, "credit_score": 400, "loan_amount": 50000, "employment_status": "unemployed"},
+    ]
+    with patch("httpx.AsyncClient.stream", stream):
+        response = client.post("/api/v1/predict/batch", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["results"]) == 2
+    assert data["results"][0]["approved"] is True
+    assert data["results"][0]["audit_analysis"]["status"] == "CLEARED"
+    # One round trip for the whole batch
+    assert len(stream.calls) == 1
+    assert stream.calls[0][1]["applicant_data"]["employment_status"] == "unemployed"
+
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+def test_history_summary_and_cursor(mock_post):
+    from unittest.mock import MagicMock
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"status": "FLAGGED", "comments": [], "mode": "RULE_BASED"}
+    mock_post.return_value = mock_response
+
+    with TestClient(app) as lifespan_client:
+        payload = {
+            "applicant_income": 50000,
+            "credit_score": 750,
+            "loan_amount": 10000,
+            "employment_status": "employed"
+        }
+        lifespan_client.post("/api/v1/predict", json=payload)
+
+        summary = lifespan_client.get("/api/v1/history/summary")
+        assert summary.status_code == 200
+        data = summary.json()
+        assert data["total_records"] >= 1
+        assert data["cursor"] is not None
+        assert 0.0 < data["flagged_ratio"] <= 1.0
+        assert data["approval_rate_series"]
+
+        newer = lifespan_client.get("/api/v1/history", params={"since": data["cursor"]})
+        assert newer.status_code == 200
+        assert newer.json() == []
+
+def test_batch_container_matches_pydantic_constraints():
+    from services.loan_inference.app.batch import LoanApplicationBatch, BatchValidationError
+    import numpy as np
+
+    batch = LoanApplicationBatch.from_columns(
+        applicant_income=[50000, 10000],
+        credit_score=[750, 400],
+        loan_amount=[10000, 50000],
+        employment_status=["employed", "unemployed"]
+    )
+    assert len(batch) == 2
+    assert batch.credit_score.dtype == np.int16
+    assert batch[1:].credit_score.base is not None  # slices are views
+    assert batch.to_records()[1] == {
+        "applicant_income": 10000.0, "credit_score": 400, "loan_amount": 50000.0, "employment_status": "unemployed"
+    }
+
+    try:
+        LoanApplicationBatch.from_columns(
+            applicant_income=[-100, 1], credit_score=[900, 700.5],
+            loan_amount=[10000, 1], employment_status=["employed", "astronaut"]
+        )
+        assert False, "expected BatchValidationError"
+    except BatchValidationError as e:
+        locs = [tuple(err["loc"][1:]) for err in e.errors]
+        assert locs == [
+            (0, "applicant_income"), (0, "credit_score"),
+            (1, "credit_score"), (1, "employment_status"),
+        ]
+
+@patch("httpx.AsyncClient.stream", fake_audit_stream())
+def test_predict_batch_columnar_and_validation():
+    with TestClient(app) as lifespan_client:
+        before = lifespan_client.get("/api/v1/history/summary").json()["total_records"]
+        columnar = {
+            "applicant_income": [50000, 60000],
+            "credit_score": [750, 780],
+            "loan_amount": [10000, 12000],
+            "employment_status": ["employed", "employed"]
+        }
+        response = lifespan_client.post("/api/v1/predict/batch", json=columnar)
+        assert response.status_code == 200
+        assert [r["approved"] for r in response.json()["results"]] == [True, True]
+        after = lifespan_client.get("/api/v1/history/summary").json()["total_records"]
+        assert after == before + 2
+
+    invalid = [{"applicant_income": -1, "credit_score": 750, "loan_amount": 1, "employment_status": "employed"}]
+    response = client.post("/api/v1/predict/batch", json=invalid)
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", 0, "applicant_income"]
+
+    row = {"applicant_income": 50000, "credit_score": 750, "loan_amount": 1, "employment_status": "employed"}
+    malformed = [
+        [{**row, "employment_status": ["employed"]}],
+        [{**row, "applicant_income": [1]}, row],
+        {"applicant_income": [[1], [2]], "credit_score": [750, 750], "loan_amount": [1, 1], "employment_status": ["employed"] * 2},
+    ]
+    for body in malformed:
+        assert client.post("/api/v1/predict/batch", json=body).status_code == 422
+
+    schema = client.get("/openapi.json").text
+    assert "#/$defs/" not in schema
+
+    # Oversized batches are rejected on row count, before any row is validated
+    from services.loan_inference.app import batch as batch_module
+    with patch("services.loan_inference.app.api.MAX_BATCH_SIZE", 2), \
+            patch.object(batch_module.LoanApplicationBatch, "from_payload", side_effect=AssertionError("validated")):
+        assert client.post("/api/v1/predict/batch", json=[{"bad": 1}] * 3).status_code == 413
+        assert client.post("/api/v1/predict/batch", json={"credit_score": [1, 2, 3]}).status_code == 413
+
+def test_auditor_pool_balances_and_ejects():
+    import asyncio
+    import time
+    from unittest.mock import MagicMock
+    from services.loan_inference.app.auditor_client import AuditorPool
+
+    pool = AuditorPool(["http://a/audit", "http://b/audit"], eject_after=2, eject_seconds=60)
+    a, b = pool.replicas
+    a.outstanding = 3
+    assert pool.pick() is b
+
+    async def post(self, url, **kwargs):
+        if url == "http://b/audit":
+            raise RuntimeError("connection refused")
+        response = MagicMock()
+        response.status_code = 200
+        return response
+
+    async def run():
+        with patch("httpx.AsyncClient.post", post):
+            for _ in range(2):
+                try:
+                    await pool._post_to(b)
+                except RuntimeError:
+                    pass
+            assert not b.is_healthy(time.monotonic())
+            # Ejected replica is skipped even though it has fewer outstanding requests
+            a.outstanding = 5
+            assert pool.pick() is a
+            response = await pool.post()
+            assert response.status_code == 200
+
+    asyncio.run(run())
+    assert pool.snapshot()["replicas"][1]["healthy"] is False
+
+def test_auditor_pool_hedges_slow_primary():
+    import asyncio
+    from unittest.mock import MagicMock
+    from services.loan_inference.app.auditor_client import AuditorPool
+
+    pool = AuditorPool(["http://slow/audit", "http://fast/audit"], hedging=True, hedge_min_samples=5)
+    pool.latencies.extend([0.01] * 10)
+    slow, fast = pool.replicas
+
+    async def post(self, url, **kwargs):
+        await asyncio.sleep(5 if url == "http://slow/audit" else 0.01)
+        response = MagicMock()
+        response.status_code = 200
+        response.url = url
+        return response
+
+    async def run():
+        with patch("httpx.AsyncClient.post", post):
+            # Primary is always the slow replica, the hedge goes to the fast one
+            pool.pick = lambda exclude=None: fast if exclude is slow else slow
+            return await asyncio.wait_for(pool.post(), timeout=1)
+
+    response = asyncio.run(run())
+    assert response.url == "http://fast/audit"
+    assert pool.hedges_sent == 1 and pool.hedges_won == 1
+    assert slow.outstanding == 0 and slow.failures == 0
+
+def test_profiling_disabled_installs_nothing(monkeypatch):
+    from fastapi import FastAPI
+    from services.loan_inference.app.profiling import install_profiling
+
+    monkeypatch.delenv("PROFILING_ENABLED", raising=False)
+    bare = FastAPI()
+    routes_before = len(bare.routes)
+    install_profiling(bare)
+    assert bare.user_middleware == []
+    assert len(bare.routes) == routes_before
+
+def test_profiling_request_artifact_and_admin_profile(monkeypatch, tmp_path):
+    import json
+    import time
+    from fastapi import FastAPI
+    from services.loan_inference.app.profiling import install_profiling
+
+    monkeypatch.setenv("PROFILING_ENABLED", "true")
+    monkeypatch.setenv("PROFILING_TOKEN", "secret")
+    monkeypatch.setenv("PROFILING_INTERVAL_MS", "1")
+    monkeypatch.setenv("PROFILING_OUTPUT_DIR", str(tmp_path))
+
+    profiled = FastAPI()
+
+    @profiled.get("/busy")
+    async def busy():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        return {"ok": True}
+
+    install_profiling(profiled)
+    with TestClient(profiled) as profiled_client:
+        assert "X-Profile-Artifact" not in profiled_client.get("/busy").headers
+
+        response = profiled_client.get("/busy", headers={"X-Profile-Token": "secret"})
+        artifact = json.loads(open(response.headers["X-Profile-Artifact"], "rb").read())
+        assert artifact["profiles"][0]["type"] == "sampled"
+        assert artifact["profiles"][0]["samples"]
+        assert any(frame["name"] == "busy" for frame in artifact["shared"]["frames"])
+
+        assert profiled_client.post("/admin/profile/start").status_code == 403
+        started = profiled_client.post("/admin/profile/start", params={"seconds": 5}, headers={"X-Profile-Token": "secret"})
+        assert started.status_code == 200
+        profiled_client.get("/busy")
+        report = profiled_client.post("/admin/profile/stop", headers={"X-Profile-Token": "secret"}).json()
+        assert report["samples"] > 0
+        assert report["hot_stacks"]
+        assert profiled_client.post("/admin/profile/stop", headers={"X-Profile-Token": "secre\u00e9".encode("latin-1")}).status_code == 403
+
+    # Sampled without a token: profiled to disk, but no server path is disclosed
+    monkeypatch.setenv("PROFILING_SAMPLE_RATE", "1.0")
+    sampled_dir = tmp_path / "sampled"
+    monkeypatch.setenv("PROFILING_OUTPUT_DIR", str(sampled_dir))
+    sampled = FastAPI()
+    sampled.get("/busy")(busy)
+    install_profiling(sampled)
+    with TestClient(sampled) as sampled_client:
+        assert "X-Profile-Artifact" not in sampled_client.get("/busy").headers
+        assert "X-Profile-Artifact" in sampled_client.get("/busy", headers={"X-Profile-Token": "secret"}).headers
+    assert len(list(sampled_dir.iterdir())) == 2
+
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+def test_shadow_scoring_report(mock_post, monkeypatch):
+    import time
+    from unittest.mock import MagicMock
+    from services.loan_inference.app.shadow import shadow_scorer
+
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"status": "CLEARED", "comments": [], "mode": "RULE_BASED"}
+    mock_post.return_value = mock_response
+    monkeypatch.setattr(shadow_scorer, "models", ["affordability_v2", "scorecard_v3"])
+    monkeypatch.setattr(shadow_scorer, "processes", 1)
+    monkeypatch.setattr(shadow_scorer, "flush_seconds", 0.05)
+
+    payload = {
+        "applicant_income": 50000,
+        "credit_score": 750,
+        "loan_amount": 10000,
+        "employment_status": "employed"
+    }
+    with TestClient(app) as lifespan_client:
+        persisted = shadow_scorer.persisted
+        assert lifespan_client.post("/api/v1/predict", json=payload).status_code == 200
+        deadline = time.monotonic() + 10
+        while shadow_scorer.persisted == persisted and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        report = lifespan_client.get("/api/v1/shadow/report").json()
+        assert report["scorer"]["enabled"] is True
+        assert report["scorer"]["dropped"] == 0
+        assert report["scorer"]["persisted"] - persisted == 2  # one row per challenger, one batched write
+        models = {m["model_name"]: m for m in report["models"]}
+        assert set(models) == {"affordability_v2", "scorecard_v3"}
+        assert models["scorecard_v3"]["comparisons"] >= 1
+    assert shadow_scorer.enabled is False
+
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+def test_shadow_disabled_skips_feature_dump(mock_post):
+    from unittest.mock import MagicMock
+    from services.loan_inference.app.shadow import shadow_scorer
+
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"status": "CLEARED", "comments": [], "mode": "RULE_BASED"}
+    mock_post.return_value = mock_response
+
+    payload = {"applicant_income": 50000, "credit_score": 750, "loan_amount": 10000, "employment_status": "employed"}
+    assert shadow_scorer.enabled is False
+    with patch.object(shadow_scorer, "submit") as submit:
+        assert client.post("/api/v1/predict", json=payload).status_code == 200
+    submit.assert_not_called()
+
+def test_shadow_queue_drops_when_full():
+    import asyncio
+    from services.loan_inference.app.shadow import ShadowScorer
+
+    scorer = ShadowScorer(["scorecard_v3"], queue_size=1)
+
+    async def run():
+        scorer._queue = asyncio.Queue(maxsize=scorer.queue_size)  # no workers draining it
+        for _ in range(3):
+            scorer.submit("id", {}, True, 0.9, 0.1)
+
+    asyncio.run(run())
+    assert scorer.submitted == 1
+    assert scorer.dropped == 2
+
+def test_ledger_chain_checkpoints_and_tamper_detection(monkeypatch, tmp_path):
+    import asyncio
+    import pytest
+    from sqlalchemy import delete, update
+    from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+    from sqlalchemy.orm import sessionmaker
+    from services.loan_inference.app import ledger
+    from services.loan_inference.app.database import Base
+    from sqlalchemy.future import select
+    from services.loan_inference.app.db_models import LedgerCheckpoint, LoanRecord
+    from services.loan_inference.app.ledger_cli import verify_database
+
+    monkeypatch.setattr(ledger, "CHECKPOINT_INTERVAL", 4)
+    db_path = tmp_path / "ledger.db"
+    ledger_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    Session = sessionmaker(ledger_engine, class_=AsyncSession, expire_on_commit=False)
+
+    def row(i):
+        return {"applicant_income": 40000.0 + i, "credit_score": 700, "decision": "Approved",
+                "audit_status": "CLEARED", "audit_comments": ""}
+
+    async def run():
+        async with ledger_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with Session() as session:
+            await ledger.append_records(session, [row(0), row(1), row(2)])   # seq 1-3
+            await ledger.append_records(session, [row(i) for i in range(3, 10)])  # seq 4-10, checkpoints 1-4, 5-8
+
+            full = await ledger.verify_range(session, 1)
+            assert full["valid"] and full["verified_records"] == 10 and full["verified_checkpoints"] == 2
+            partial = await ledger.verify_range(session, 5, 8)
+            assert partial["valid"] and partial["verified_records"] == 4 and partial["verified_checkpoints"] == 1
+
+            # Past the head is clamped, not reported as a gap
+            beyond = await ledger.verify_range(session, 1, 1000)
+            assert beyond["valid"] and beyond["to"] == beyond["head"] == 10
+            assert beyond["checkpoint_root"] == full["checkpoint_root"]
+
+            # Checkpoints are chained: resealing block 1-4 with an unchained root breaks block 5-8 too
+            block = (await session.execute(
+                select(LoanRecord.row_hash).where(LoanRecord.seq.between(1, 4)).order_by(LoanRecord.seq)
+            )).scalars().all()
+            await session.execute(
+                update(LedgerCheckpoint).where(LedgerCheckpoint.start_seq == 1).values(merkle_root=ledger.merkle_root(block))
+            )
+            await session.commit()
+            assert (await ledger.verify_range(session, 5, 8))["first_invalid_seq"] == 5
+            assert (await ledger.verify_range(session, 1, 4))["first_invalid_seq"] == 1
+
+            await session.execute(update(LoanRecord).where(LoanRecord.seq == 6).values(decision="Denied"))
+            await session.commit()
+            tampered = await ledger.verify_range(session, 5, 8)
+            assert tampered["valid"] is False and tampered["first_invalid_seq"] == 6
+
+        # A changed interval is refused at startup instead of sealing misaligned blocks
+        async with ledger_engine.begin() as conn:
+            await conn.run_sync(ledger.check_checkpoint_interval)
+            monkeypatch.setattr(ledger, "CHECKPOINT_INTERVAL", 3)
+            with pytest.raises(RuntimeError, match="sealed every 4 records"):
+                await conn.run_sync(ledger.check_checkpoint_interval)
+            monkeypatch.setattr(ledger, "CHECKPOINT_INTERVAL", 4)
+
+        # A missing predecessor checkpoint skips sealing rather than chaining from genesis
+        async with Session() as session:
+            await session.execute(delete(LedgerCheckpoint).where(LedgerCheckpoint.start_seq == 5))
+            await ledger.append_records(session, [row(i) for i in range(10, 14)])  # seq 11-14 would seal 9-12
+            ends = (await session.execute(select(LedgerCheckpoint.end_seq))).scalars().all()
+            assert ends == [4]
+        await ledger_engine.dispose()
+
+    asyncio.run(run())
+    valid, error, records, _, _ = verify_database(str(db_path))
+    assert valid is False and "checkpoint 1-4" in error and records == 4
+
+def test_ledger_concurrent_writers_retry_on_seq_conflict(monkeypatch, tmp_path):
+    import asyncio
+    import contextlib
+    from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+    from sqlalchemy.orm import sessionmaker
+    from services.loan_inference.app import ledger
+    from services.loan_inference.app.database import Base
+
+    db_path = tmp_path / "race.db"
+    monkeypatch.setattr(ledger, "CHECKPOINT_INTERVAL", 4)
+    # Two worker processes: separate engines and no shared in-process lock
+    monkeypatch.setattr(ledger, "_chain_lock", contextlib.nullcontext())
+    engines = [create_async_engine(f"sqlite+aiosqlite:///{db_path}") for _ in range(2)]
+    read_head = ledger._chain_head
+    reads = []
+
+    async def run():
+        async with engines[0].begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        both_read = asyncio.Barrier(2)
+
+        async def racing_head(db):
+            head = await read_head(db)
+            reads.append(head[0])
+            if len(reads) <= 2:
+                await both_read.wait()  # both writers hold the same stale head
+            return head
+
+        monkeypatch.setattr(ledger, "_chain_head", racing_head)
+
+        def rows(tag):
+            return [{"applicant_income": 1.0, "credit_score": 700, "decision": tag,
+                     "audit_status": "CLEARED", "audit_comments": ""} for _ in range(3)]
+
+        sessions = [sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() for engine in engines]
+        await asyncio.gather(*(ledger.append_records(session, rows(f"w{i}")) for i, session in enumerate(sessions)))
+        report = await ledger.verify_range(sessions[0], 1)
+        for session in sessions:
+            await session.close()
+        for engine in engines:
+            await engine.dispose()
+        return report
+
+    report = asyncio.run(run())
+    assert reads[:2] == [0, 0] and len(reads) == 3  # the loser re-read the head once
+    assert report["valid"] and report["verified_records"] == 6 and report["verified_checkpoints"] == 1
+
+def test_ledger_migrates_pre_ledger_schema(tmp_path):
+    import asyncio
+    import sqlite3
+    from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+    from sqlalchemy.orm import sessionmaker
+    from services.loan_inference.app import ledger
+    from services.loan_inference.app.database import Base
+
+    db_path = tmp_path / "old.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE loan_records (id VARCHAR PRIMARY KEY, timestamp DATETIME, applicant_income FLOAT, "
+        "credit_score INTEGER, decision VARCHAR, audit_status VARCHAR, audit_comments VARCHAR)"
+    )
+    conn.execute("INSERT INTO loan_records VALUES ('legacy', '2024-01-01 00:00:00', 1.0, 700, 'Approved', 'CLEARED', '')")
+    conn.commit()
+    conn.close()
+
+    old_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    Session = sessionmaker(old_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def run():
+        async with old_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            added = await conn.run_sync(ledger.migrate_ledger_schema)
+            assert added == ["seq", "prev_hash", "row_hash"]
+            assert await conn.run_sync(ledger.migrate_ledger_schema) == []  # idempotent
+        async with Session() as session:
+            await ledger.append_records(session, [{"applicant_income": 2.0, "credit_score": 710, "decision": "Approved",
+                                                   "audit_status": "CLEARED", "audit_comments": ""}])
+            assert (await ledger.verify_range(session, 1))["verified_records"] == 1
+        await old_engine.dispose()
+
+    asyncio.run(run())
+
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+def test_ledger_verify_endpoint(mock_post):
+    from unittest.mock import MagicMock
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"status": "CLEARED", "comments": ["ok"], "mode": "RULE_BASED"}
+    mock_post.return_value = mock_response
+
+    payload = {
+        "applicant_income": 50000,
+        "credit_score": 750,
+        "loan_amount": 10000,
+        "employment_status": "employed"
+    }
+    with TestClient(app) as lifespan_client:
+        lifespan_client.post("/api/v1/predict", json=payload)
+        lifespan_client.post("/api/v1/predict", json=payload)
+        report = lifespan_client.get("/api/v1/ledger/verify", params={"from": 1}).json()
+        assert report["valid"] is True
+        assert report["verified_records"] == report["to"] >= 2
+
+def test_admission_control_sheds_with_retry_after(monkeypatch):
+    from fastapi import FastAPI
+    from services.loan_inference.app.admission import install_admission_control
+
+    monkeypatch.setenv("ADMISSION_MAX_INFLIGHT", "0")
+    monkeypatch.setenv("ADMISSION_RETRY_AFTER_S", "3")
+    monkeypatch.setenv("ADMISSION_PRIORITY_TOKEN", "vip")
+
+    guarded = FastAPI()
+
+    @guarded.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @guarded.get("/work")
+    async def work():
+        return {"ok": True}
+
+    saturation = {"value": 0.0}
+    controller = install_admission_control(guarded, db_pool_saturation=lambda: saturation["value"])
+    guarded_client = TestClient(guarded)
+
+    shed = guarded_client.get("/work")
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "3"
+    assert shed.json()["reason"] == "inflight"
+    assert guarded_client.get("/health").status_code == 200
+    assert guarded_client.get("/work", headers={"X-Admission-Priority": "vip"}).status_code == 200
+    assert guarded_client.get("/work", headers={"X-Admission-Priority": "v\u00edp".encode("latin-1")}).status_code == 503
+
+    controller.max_inflight = 10
+    controller.monitor.lag_ms = 10_000
+    assert guarded_client.get("/work").json()["reason"] == "loop_lag"
+    controller.monitor.lag_ms = 0.0
+    saturation["value"] = 1.0
+    assert guarded_client.get("/work").json()["reason"] == "db_pool"
+    saturation["value"] = 0.2
+    assert guarded_client.get("/work").status_code == 200
+
+    stats = guarded_client.get("/admission").json()
+    assert stats["shed"] == {"inflight": 2, "loop_lag": 1, "db_pool": 1}
+    assert stats["admitted"] == 1  # exempt and priority calls bypass the controller
+    assert stats["inflight"] == 0
+
+def test_admission_counts_streamed_bodies_and_db_sessions(monkeypatch):
+    import asyncio
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from services.loan_inference.app import database
+    from services.loan_inference.app.admission import install_admission_control
+
+    monkeypatch.setenv("ADMISSION_MAX_INFLIGHT", "10")
+    streamed = FastAPI()
+    controller = install_admission_control(streamed)
+    seen = []
+
+    @streamed.get("/stream")
+    async def stream():
+        async def body():
+            for _ in range(3):
+                seen.append(controller.inflight)
+                yield b"line\n"
+        return StreamingResponse(body())
+
+    assert TestClient(streamed).get("/stream").status_code == 200
+    assert seen == [1, 1, 1]
+    assert controller.inflight == 0
+
+    # SQLite's NullPool has no size; the gauge counts sessions handed out by get_db instead
+    monkeypatch.setattr(database, "DB_MAX_SESSIONS", 2)
+
+    async def hold_sessions():
+        sessions = [database.get_db(), database.get_db()]
+        for session in sessions:
+            await session.__anext__()
+        held = database.session_saturation()
+        for session in sessions:
+            await session.aclose()
+        return held
+
+    assert asyncio.run(hold_sessions()) == 1.0
+    assert database.session_saturation() == 0.0
+
+def test_loop_lag_monitor_detects_blocking():
+    import asyncio
+    import time
+    from services.loan_inference.app.admission import LoopLagMonitor
+
+    async def run():
+        monitor = LoopLagMonitor(interval=0.01, smoothing=1.0)
+        monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # block the loop
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+        return monitor
+
+    assert asyncio.run(run()).max_lag_ms >= 50
+
+def test_predict_uses_msgpack_transport(monkeypatch):
+    import msgpack
+    from unittest.mock import MagicMock
+    from services.loan_inference.app.auditor_client import auditor_pool
+
+    monkeypatch.setattr(auditor_pool, "transport", "msgpack")
+    sent = {}
+
+    async def post(self, url, content=None, headers=None, **kwargs):
+        sent.update(url=url, body=msgpack.unpackb(content), headers=headers)
+        response = MagicMock()
+        response.status_code = 200
+        response.content = msgpack.packb({
+            "audit_id": "test-789", "status": "CLEARED", "compliance_score": 1.0, "comments": [], "mode": "RULE_BASED"
+        })
+        return response
+
+    payload = {
+        "applicant_income": 50000,
+        "credit_score": 750,
+        "loan_amount": 10000,
+        "employment_status": "employed"
+    }
+    with patch("httpx.AsyncClient.post", post):
+        response = client.post("/api/v1/predict", json=payload)
+    assert response.status_code == 200
+    assert response.json()["audit_analysis"]["audit_id"] == "test-789"
+    assert sent["url"].endswith("/audit/msgpack")
+    assert sent["headers"]["Content-Type"] == "application/msgpack"
+    assert sent["body"]["applicant_data"]["employment_status"] == "employed"
+
+def test_drift_sketches_are_bounded_and_detect_shift(tmp_path):
+    import random
+    from services.loan_inference.app.drift import DriftMonitor, TDigest, numeric_psi, ks_statistic
+
+    rng = random.Random(7)
+    baseline, same, shifted = TDigest(), TDigest(), TDigest()
+    for _ in range(20000):
+        baseline.add(rng.gauss(650, 50))
+        same.add(rng.gauss(650, 50))
+        shifted.add(rng.gauss(590, 50))
+    assert len(baseline.means) <= baseline.compression
+    assert abs(baseline.quantile(0.5) - 650) < 3
+    assert numeric_psi(baseline, same) < 0.1 and ks_statistic(baseline, same) < 0.05
+    assert numeric_psi(baseline, shifted) > 0.2 and ks_statistic(baseline, shifted) > 0.3
+
+    path = tmp_path / "baseline.json"
+    monitor = DriftMonitor(window_seconds=60, windows=3, baseline_path=str(path))
+    for i in range(500):
+        monitor.observe(rng.gauss(700, 30), 50000, 10000, 0.8, "employed", "FLAGGED" if i % 10 == 0 else "CLEARED")
+    assert monitor.report()["features"]["credit_score"]["psi"] is None
+    assert monitor.pin_baseline()["observations"] == 500
+
+    reloaded = DriftMonitor(window_seconds=60, windows=3, baseline_path=str(path))
+    for i in range(500):
+        reloaded.observe(rng.gauss(600, 30), 50000, 10000, 0.8, "unemployed", "FLAGGED" if i % 2 == 0 else "CLEARED")
+    report = reloaded.report()
+    assert report["features"]["credit_score"]["status"] == "drift"
+    assert report["categories"]["employment_status"]["status"] == "drift"
+    assert abs(report["flagged_rate"]["baseline"] - 0.1) < 0.01
+    assert abs(report["flagged_rate"]["current"] - 0.5) < 0.01
+
+    # Old windows are recycled in place: the ring never grows
+    for t in range(100):
+        reloaded.observe(650, 50000, 10000, 0.8, "employed", "CLEARED", now=t * 60.0)
+    assert len(reloaded.windows) == 3
+    assert reloaded.current(now=99 * 60.0 + 1).categories["audit_status"].total == 3
+
+@patch("httpx.AsyncClient.post", new_callable=AsyncMock)
+def test_drift_endpoint_observes_predictions(mock_post):
+    from unittest.mock import MagicMock
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {
+        "status": "FLAGGED", "compliance_score": 0.2, "comments": ["Flag"], "mode": "RULE_BASED", "audit_id": "test-drift"
+    }
+    mock_post.return_value = mock_response
+
+    before = client.get("/api/v1/monitoring/drift").json()["observations"]
+    payload = {"applicant_income": 50000, "credit_score": 750, "loan_amount": 10000, "employment_status": "retired"}
+    assert client.post("/api/v1/predict", json=payload).status_code == 200
+
+    report = client.get("/api/v1/monitoring/drift").json()
+    assert report["observations"] == before + 1
+    assert report["flagged_rate"]["current"] > 0
+    assert report["categories"]["employment_status"]["distribution"]["retired"] > 0
+    assert set(report["features"]) == {"credit_score", "applicant_income", "loan_amount", "confidence_score"}
+
+def test_auditor_pool_http2_requires_h2(monkeypatch):
+    import importlib.util
+    import pytest
+    from services.loan_inference.app.auditor_client import AuditorPool
+
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    with pytest.raises(ValueError, match="h2"):
+        AuditorPool(["http://auditor/audit"], http2=True)
+    AuditorPool(["http://auditor/audit"])